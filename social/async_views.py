@@ -0,0 +1,69 @@
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.functional import classproperty
+
+
+class AsyncViewMixin:
+    """Serve selected handlers natively on the event loop under ASGI.
+
+    When ``settings.ASYNC_VIEWS`` is on, a handler named ``a<action>`` (or
+    ``a<method>`` outside viewsets) is awaited instead of the synchronous
+    one. Authentication, permissions and throttling still run through the
+    regular ``initial()``, in a worker thread. Handlers without an async
+    twin fall back to the synchronous dispatch in a thread as well, so
+    writes behave exactly as before.
+
+    Async handlers must load everything the serializer touches up front:
+    lazy relations would hit the database from the event loop.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return settings.ASYNC_VIEWS
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+
+        if cls.view_is_async:
+            markcoroutinefunction(view)
+
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.view_is_async:
+            return super().dispatch(request, *args, **kwargs)
+
+        return self._adispatch(request, *args, **kwargs)
+
+    def _async_handler(self, request):
+        method = request.method.lower()
+        name = getattr(self, "action_map", {}).get(method, method)
+
+        return getattr(self, f"a{name}", None)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        handler = self._async_handler(request)
+
+        if handler is None:
+            return await sync_to_async(super().dispatch)(
+                request, *args, **kwargs
+            )
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+
+        return self.response
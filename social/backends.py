@@ -0,0 +1,98 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+# Django caches keeping their entries inside one process: what one worker
+# writes or deletes there, the others never see
+PROCESS_LOCAL_CACHES = (DummyCache, LocMemCache)
+
+
+def is_cache_shared(alias="default"):
+    """Whether every process sees the Django cache ``alias``, ex. Redis"""
+    return not isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+class BaseBackend:
+    """A store seen by every web and Celery process, ex. Redis.
+
+    Backends keeping their data inside the current process set
+    ``shared`` to False: what one process writes, no other one sees.
+    """
+
+    shared = True
+
+    def __init__(self, location=None):
+        self.location = location
+
+
+class LocMemBackend(BaseBackend):
+    """Base of the in-process backends, for tests and single processes"""
+
+    shared = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+
+class RedisBackend(BaseBackend):
+    """Base of the backends keeping their data at the Redis ``location``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import redis
+
+        self._client = redis.Redis.from_url(self.location)
+
+
+class BackendSetting:
+    """A settings dict naming a backend, ex. SOCIAL_TIMELINE.
+
+    ``BACKEND`` is the dotted path of the backend class (or None for no
+    backend) and ``LOCATION`` its store. The keys listed in ``options``
+    are passed lowercased to the constructor as well. The backend is
+    built once per process, and again after the setting changed (ex.
+    with override_settings).
+    """
+
+    def __init__(self, name, defaults, options=()):
+        self.name = name
+        self.defaults = defaults
+        self.options = options
+        self._backend = None
+        self._lock = threading.Lock()
+        setting_changed.connect(self._setting_changed, weak=False)
+
+    def get(self):
+        return {**self.defaults, **getattr(settings, self.name, {})}
+
+    def get_backend(self):
+        with self._lock:
+            if self._backend is None:
+                self._backend = self._build()
+
+            return self._backend
+
+    def _build(self):
+        options = self.get()
+
+        if options["BACKEND"] is None:
+            return None
+
+        return import_string(options["BACKEND"])(
+            location=options["LOCATION"],
+            **{name.lower(): options[name] for name in self.options}
+        )
+
+    def reset(self):
+        with self._lock:
+            self._backend = None
+
+    def _setting_changed(self, setting, **kwargs):
+        if setting == self.name:
+            self.reset()
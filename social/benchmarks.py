@@ -0,0 +1,103 @@
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return None
+
+    rank = max(math.ceil(fraction * len(samples)), 1)
+    return samples[rank - 1]
+
+
+def format_ms(value):
+    """A latency column, empty when no request succeeded"""
+    return f"{'-':>9}" if value is None else f"{value:>9.1f}"
+
+
+def _request(url, token=None, method="GET", data=None):
+    headers = {"Content-Type": "application/json"}
+
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    body = json.dumps(data).encode() if data is not None else None
+    request = Request(url, data=body, headers=headers, method=method)
+
+    with urlopen(request, timeout=30) as response:
+        return response.status, response.read()
+
+
+def obtain_token(base_url, email, password):
+    _, body = _request(
+        f"{base_url}/api/user/token/",
+        method="POST",
+        data={"email": email, "password": password}
+    )
+    return json.loads(body)["access"]
+
+
+def _timed_request(url, token, method):
+    started = time.perf_counter()
+
+    try:
+        status, _ = _request(url, token, method=method)
+    except HTTPError as error:
+        status = error.code
+    except URLError:
+        status = None
+
+    return time.perf_counter() - started, status
+
+
+def run_load(url, token, requests, concurrency, method="GET"):
+    """Fire ``requests`` calls at ``url`` from ``concurrency`` threads.
+
+    Returns throughput, p50/p99 latency in milliseconds of the 2xx
+    responses, and the number of throttled (429) and other failed
+    requests. A refused request answers fast, so counting it would make
+    the latencies look better than they are.
+    """
+    return run_requests(
+        lambda _: (url, token, method), requests, concurrency
+    )
+
+
+def run_requests(request_for, requests, concurrency):
+    """``run_load`` where ``request_for(index)`` gives (url, token, method).
+
+    Spreading calls over users and objects keeps per-user throttles and
+    row locks from dominating the numbers.
+    """
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda index: _timed_request(*request_for(index)),
+            range(requests)
+        ))
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(
+        latency * 1000
+        for latency, status in results
+        if status is not None and 200 <= status < 300
+    )
+    throttled = sum(1 for _, status in results if status == 429)
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_second": requests / elapsed,
+        "successes_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "throttled": throttled,
+        "errors": requests - len(latencies) - throttled,
+    }
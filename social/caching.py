@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+from social.models import Post
+from social.serializers import first_comments_prefetch
+
+DEFAULTS = {
+    "LOCAL_MAX_SIZE": 10000,
+    "LOCAL_TIMEOUT": 5,
+    "SHARED_CACHE": "default",
+    "SHARED_TIMEOUT": 300,
+}
+
+
+def cache_settings():
+    return {**DEFAULTS, **getattr(settings, "SOCIAL_CACHE", {})}
+
+
+class LRUCache:
+    """Bounded in-process cache evicting the least recently used entry"""
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+
+                if entry is None:
+                    continue
+
+                expires_at, value = entry
+
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+
+                self._entries.move_to_end(key)
+                found[key] = value
+
+        return found
+
+    def set_many(self, mapping):
+        expires_at = time.monotonic() + self.timeout
+
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """An in-process LRU in front of a shared Django cache (Redis).
+
+    Other processes only learn about invalidations through the shared
+    tier, so the local tier keeps entries for a few seconds at most.
+    """
+
+    def __init__(self, local, shared, shared_timeout):
+        self.local = local
+        self.shared = shared
+        self.shared_timeout = shared_timeout
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, **counts):
+        with self._lock:
+            self._counters.update(counts)
+
+    def get_many(self, keys):
+        found = self.local.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        from_shared = self.shared.get_many(missing) if missing else {}
+
+        if from_shared:
+            self.local.set_many(from_shared)
+
+        found.update(from_shared)
+        self._count(
+            local_hits=len(found) - len(from_shared),
+            shared_hits=len(from_shared),
+            misses=len(keys) - len(found),
+        )
+
+        return found
+
+    def set_many(self, mapping):
+        self.local.set_many(mapping)
+        self.shared.set_many(mapping, self.shared_timeout)
+
+    def delete_many(self, keys):
+        self.local.delete_many(keys)
+        self.shared.delete_many(keys)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+
+        lookups = sum(counters.values())
+        hits = lookups - counters.get("misses", 0)
+
+        return {
+            "local_hits": counters.get("local_hits", 0),
+            "shared_hits": counters.get("shared_hits", 0),
+            "misses": counters.get("misses", 0),
+            "hit_rate": hits / lookups if lookups else None,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_cache():
+    options = cache_settings()
+
+    return TwoTierCache(
+        LRUCache(options["LOCAL_MAX_SIZE"], options["LOCAL_TIMEOUT"]),
+        caches[options["SHARED_CACHE"]],
+        options["SHARED_TIMEOUT"],
+    )
+
+
+def _key(model, pk):
+    return f"object:{model._meta.label_lower}:{pk}"
+
+
+def _get_many(queryset, ids):
+    """Return {pk: instance} for the ids found, loading misses in bulk"""
+    keys = {_key(queryset.model, pk): pk for pk in ids}
+    cached = get_cache().get_many(list(keys))
+    found = {keys[key]: instance for key, instance in cached.items()}
+    missing = [pk for pk in keys.values() if pk not in found]
+
+    if missing:
+        loaded = queryset.in_bulk(missing)
+        get_cache().set_many(
+            {_key(queryset.model, pk): obj for pk, obj in loaded.items()}
+        )
+        found.update(loaded)
+
+    return found
+
+
+def get_posts(ids):
+    """Posts ready for PostDetailSerializer: author, tags and comments"""
+    return _get_many(
+        Post.objects.select_related("created_by").prefetch_related(
+            "tags", first_comments_prefetch()
+        ),
+        ids
+    )
+
+
+def get_users(ids):
+    """Users ready for UserDetailSerializer: followers and follows"""
+    return _get_many(
+        get_user_model().objects.prefetch_related("followers", "follows"),
+        ids
+    )
+
+
+def invalidate_posts(ids):
+    get_cache().delete_many([_key(Post, pk) for pk in ids])
+
+
+def invalidate_users(ids):
+    get_cache().delete_many([_key(get_user_model(), pk) for pk in ids])
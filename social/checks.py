@@ -0,0 +1,63 @@
+from django.core.checks import Error, Warning, register
+
+from social import likes, throttling, timeline
+
+
+@register()
+def check_timeline_backend(app_configs, **kwargs):
+    backend = timeline.get_backend()
+
+    if backend is None or backend.shared:
+        return []
+
+    return [
+        Warning(
+            "SOCIAL_TIMELINE uses a per-process backend.",
+            hint=(
+                "Posts fanned out by Celery workers never reach the "
+                "timelines of the web processes. Use "
+                "social.timeline.RedisTimelineBackend, or no BACKEND to "
+                "read timelines from the database."
+            ),
+            id="social.W001",
+        )
+    ]
+
+
+@register()
+def check_like_buffer_backend(app_configs, **kwargs):
+    options = likes.like_buffer_settings()
+
+    if not options["ENABLED"] or likes.get_like_buffer().shared:
+        return []
+
+    return [
+        Error(
+            "SOCIAL_LIKE_BUFFER is enabled with a per-process backend.",
+            hint=(
+                "The Celery worker flushing the buffer never sees toggles "
+                "buffered by the web processes. Use "
+                "social.likes.RedisLikeBuffer."
+            ),
+            id="social.E001",
+        )
+    ]
+
+
+@register(deploy=True)
+def check_throttle_backend(app_configs, **kwargs):
+    if throttling.get_backend().shared:
+        return []
+
+    return [
+        Warning(
+            "SOCIAL_THROTTLE uses a per-process backend.",
+            hint=(
+                "Every worker counts requests on its own, so clients get "
+                "the rates once per worker. Use a shared CACHES['default'] "
+                "(ex. Redis) with social.throttling.CacheThrottleBackend, "
+                "or social.throttling.RedisThrottleBackend."
+            ),
+            id="social.W002",
+        )
+    ]
@@ -0,0 +1,147 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    "REPLICAS": [],
+    "PIN_SECONDS": 10,
+}
+
+
+def replica_settings():
+    return {**DEFAULTS, **getattr(settings, "SOCIAL_REPLICAS", {})}
+
+
+class _RequestState:
+    """Routing decisions of the request being served"""
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+_request_state = ContextVar("db_request_state", default=None)
+
+
+def _pin_key(user_id):
+    return f"db-primary-pin:{user_id}"
+
+
+def is_pinned_to_primary(user):
+    return bool(user.is_authenticated and cache.get(_pin_key(user.pk)))
+
+
+def pin_to_primary(user):
+    cache.set(_pin_key(user.pk), True, replica_settings()["PIN_SECONDS"])
+
+
+class ReplicaRouter:
+    """Send reads to a replica only where a view opted in for a request.
+
+    Everything else, including every write and all work outside HTTP
+    requests (Celery tasks, management commands), uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+
+        if state is not None and state.replica:
+            return state.replica
+
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+
+        if state is not None:
+            state.wrote = True
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """Track writes per request and pin their author to the primary.
+
+    After a request that wrote to the database, the user's safe requests
+    keep reading from the primary for ``PIN_SECONDS``, long enough for the
+    replicas to catch up, so nobody misses their own writes.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _pin_author(request):
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, "user", None)
+
+        if user is not None and user.is_authenticated:
+            pin_to_primary(user)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = _RequestState()
+        token = _request_state.set(state)
+
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote:
+            self._pin_author(request)
+
+        return response
+
+    async def __acall__(self, request):
+        state = _RequestState()
+        token = _request_state.set(state)
+
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state.wrote:
+            await sync_to_async(self._pin_author)(request)
+
+        return response
+
+
+class ReplicaReadMixin:
+    """Serve safe requests of a view from a replica unless pinned"""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        state = _request_state.get()
+        replicas = replica_settings()["REPLICAS"]
+
+        if (
+            state is not None
+            and replicas
+            and request.method in SAFE_METHODS
+            and not is_pinned_to_primary(request.user)
+        ):
+            state.replica = random.choice(replicas)
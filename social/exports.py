@@ -0,0 +1,201 @@
+import gzip
+import json
+import os
+import uuid
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.utils import timezone
+
+from social.models import Comment, DataExport, Like, Post
+
+# A claim not refreshed for this long is treated as abandoned by a
+# crashed worker
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+SECTIONS = ("profile", "posts", "comments", "likes", "follows", "followers")
+
+UNFINISHED = (DataExport.STATUS_PENDING, DataExport.STATUS_RUNNING)
+
+
+class ExportClaimLost(Exception):
+    """Another worker took over the export"""
+
+
+def _section_rows(user, section):
+    """Values of one relation of a user, every row with its ``id``"""
+    user_model = get_user_model()
+    follows = user_model.followers.through.objects
+
+    if section == "profile":
+        return user_model.objects.filter(pk=user.pk).values(
+            "id",
+            "email",
+            "username",
+            "first_name",
+            "last_name",
+            "bio",
+            "image",
+            "date_joined"
+        )
+
+    if section == "posts":
+        return Post.objects.filter(created_by=user).values(
+            "id", "hashtag", "title", "content", "image", "created_at"
+        )
+
+    if section == "comments":
+        return Comment.objects.filter(user=user).values(
+            "id", "post", "content", "created_at"
+        )
+
+    if section == "likes":
+        return Like.objects.filter(user=user).values("id", "post", "is_liked")
+
+    if section == "follows":
+        return follows.filter(to_user=user).values("id", user=F("from_user"))
+
+    return follows.filter(from_user=user).values("id", user=F("to_user"))
+
+
+def _encode(section, rows):
+    """One gzip member holding a line of JSON per row"""
+    lines = "".join(
+        json.dumps(
+            {"section": section, **row},
+            cls=DjangoJSONEncoder,
+            ensure_ascii=False
+        ) + "\n"
+        for row in rows
+    )
+
+    return gzip.compress(lines.encode(), compresslevel=6)
+
+
+def claim_export(export_id):
+    """Stamp an unfinished export with a new claim token, or return None"""
+    now = timezone.now()
+    token = uuid.uuid4()
+    claimed = DataExport.objects.filter(
+        pk=export_id, status__in=UNFINISHED
+    ).filter(
+        Q(claim_token__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT)
+    ).update(
+        claim_token=token, claimed_at=now, status=DataExport.STATUS_RUNNING
+    )
+
+    return token if claimed else None
+
+
+def abandoned_export_ids():
+    """Unfinished exports whose task was lost or whose worker died"""
+    cutoff = timezone.now() - CLAIM_TIMEOUT
+
+    return DataExport.objects.filter(status__in=UNFINISHED).filter(
+        Q(claim_token__isnull=True, created_at__lt=cutoff)
+        | Q(claimed_at__lt=cutoff)
+    ).values_list("pk", flat=True)
+
+
+def _checkpoint(export, token, **fields):
+    """Save progress while the claim is still ours, refreshing it"""
+    fields["claimed_at"] = timezone.now()
+    saved = DataExport.objects.filter(
+        pk=export.pk, claim_token=token
+    ).update(**fields)
+
+    if not saved:
+        raise ExportClaimLost(export.pk)
+
+    for name, value in fields.items():
+        setattr(export, name, value)
+
+
+def write_export(export, token, chunk_size):
+    """Append the rest of a user's data to the export's archive.
+
+    Each relation is read with a server-side cursor in pk order and
+    written ``chunk_size`` rows at a time, every chunk as its own gzip
+    member (concatenated members read back as one stream). The checkpoint
+    is saved after each chunk, so an interrupted export continues from
+    its last chunk rather than from scratch.
+    """
+    path = export.partial_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if export.offset and (
+        not os.path.exists(path) or os.path.getsize(path) < export.offset
+    ):
+        # The partial archive is gone, so is the work it recorded
+        _checkpoint(export, token, section="", last_pk=0, offset=0, rows=0)
+
+    start = SECTIONS.index(export.section) if export.section else 0
+    last_pk = export.last_pk
+
+    with open(path, "ab") as archive:
+        # Drop anything an interrupted run wrote after the checkpoint
+        archive.truncate(export.offset)
+
+        for section in SECTIONS[start:]:
+            rows = (
+                _section_rows(export.user, section)
+                .filter(pk__gt=last_pk)
+                .order_by("pk")
+                .iterator(chunk_size=chunk_size)
+            )
+
+            while chunk := list(islice(rows, chunk_size)):
+                data = _encode(section, chunk)
+                archive.write(data)
+                archive.flush()
+                os.fsync(archive.fileno())
+                _checkpoint(
+                    export,
+                    token,
+                    section=section,
+                    last_pk=chunk[-1]["id"],
+                    offset=export.offset + len(data),
+                    rows=export.rows + len(chunk)
+                )
+
+            last_pk = 0
+
+    os.replace(path, export.archive.storage.path(export.archive_name))
+    _checkpoint(
+        export,
+        token,
+        status=DataExport.STATUS_COMPLETE,
+        archive=export.archive_name,
+        completed_at=timezone.now(),
+        claim_token=None
+    )
+
+
+def purge_expired_exports(retention):
+    """Delete exports finished or failed more than ``retention`` ago.
+
+    Archives and partial archives go with them. Returns the number of
+    exports deleted.
+    """
+    cutoff = timezone.now() - retention
+    expired = list(DataExport.objects.filter(
+        Q(status=DataExport.STATUS_COMPLETE, completed_at__lt=cutoff)
+        | Q(status=DataExport.STATUS_FAILED, claimed_at__lt=cutoff)
+    ))
+    DataExport.objects.filter(
+        pk__in=[export.pk for export in expired]
+    ).delete()
+
+    for export in expired:
+        if export.archive:
+            export.archive.delete(save=False)
+
+        try:
+            os.remove(export.partial_path)
+        except FileNotFoundError:
+            pass
+
+    return len(expired)
@@ -0,0 +1,49 @@
+import re
+
+from social.models import Hashtag, Post
+
+HASHTAG_FIELD_RE = re.compile(r"\w+")
+CONTENT_HASHTAG_RE = re.compile(r"(?<!\w)#(\w+)")
+MAX_LENGTH = Hashtag._meta.get_field("name").max_length
+
+
+def normalize_hashtag(name):
+    return name.lstrip("#").lower()[:MAX_LENGTH]
+
+
+def parse_hashtags(hashtag, content):
+    """Return normalized tag names from the hashtag field and #tags"""
+    names = HASHTAG_FIELD_RE.findall(hashtag or "")
+    names += CONTENT_HASHTAG_RE.findall(content or "")
+
+    return list(dict.fromkeys(normalize_hashtag(name) for name in names))
+
+
+def sync_post_hashtags(posts):
+    """Rebuild the post-hashtag join rows for the given saved posts.
+
+    Works on any number of posts with a fixed number of queries, so it
+    is safe to call after bulk_create.
+    """
+    names_by_post = {
+        post.pk: parse_hashtags(post.hashtag, post.content) for post in posts
+    }
+    names = set().union(*names_by_post.values())
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in names], ignore_conflicts=True
+    )
+    ids_by_name = dict(
+        Hashtag.objects.filter(name__in=names).values_list("name", "id")
+    )
+
+    through = Post.tags.through
+    through.objects.filter(post_id__in=names_by_post).delete()
+    through.objects.bulk_create(
+        [
+            through(post_id=post_id, hashtag_id=ids_by_name[name])
+            for post_id, post_names in names_by_post.items()
+            for name in post_names
+        ],
+        ignore_conflicts=True
+    )
@@ -0,0 +1,112 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (320, 640, 1280)
+
+FORMAT_EXTENSIONS = {
+    "JPEG": "jpg",
+    "PNG": "png",
+    "WEBP": "webp",
+    "AVIF": "avif",
+}
+
+
+def variant_formats(original_format):
+    """Formats to encode: the original one plus any modern ones available"""
+    formats = [original_format] if original_format in FORMAT_EXTENSIONS else []
+    formats.append("WEBP")
+
+    if ".avif" in Image.registered_extensions():
+        formats.append("AVIF")
+
+    return list(dict.fromkeys(formats))
+
+
+def _encode(image, image_format):
+    if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, quality=80, optimize=True)
+
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """Save resized copies of an image next to the original.
+
+    Returns {format: {width: storage name}}, suitable for the
+    ``image_variants`` field of the owning model.
+    """
+    storage = field_file.storage
+    root, _ = os.path.splitext(field_file.name)
+
+    with field_file.open("rb") as source:
+        original = Image.open(source)
+        original_format = original.format
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    variants = {}
+
+    for width in VARIANT_WIDTHS:
+        if width >= original.width:
+            break
+
+        resized = original.copy()
+        resized.thumbnail((width, original.height), Image.LANCZOS)
+
+        for image_format in variant_formats(original_format):
+            extension = FORMAT_EXTENSIONS[image_format]
+            name = storage.save(
+                f"{root}.w{width}.{extension}",
+                ContentFile(_encode(resized, image_format))
+            )
+            variants.setdefault(extension, {})[str(width)] = name
+
+    return variants
+
+
+def delete_variants(variants, storage):
+    """Remove the files of stored variants"""
+    for names in variants.values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def discard_variants(instance):
+    """Delete the variants of an instance's image, before it is replaced.
+
+    The files go once the transaction commits, so an update rolled back
+    keeps them.
+    """
+    variants = instance.image_variants
+    storage = instance._meta.get_field("image").storage
+
+    if variants:
+        transaction.on_commit(lambda: delete_variants(variants, storage))
+
+
+def build_srcset(variants, storage, request=None):
+    """Turn stored variants into {format: "url 320w, url 640w"}"""
+    srcset = {}
+
+    for extension, names in variants.items():
+        candidates = []
+        by_width = sorted(names.items(), key=lambda item: int(item[0]))
+
+        for width, name in by_width:
+            url = storage.url(name)
+
+            if request is not None:
+                url = request.build_absolute_uri(url)
+
+            candidates.append(f"{url} {width}w")
+
+        srcset[extension] = ", ".join(candidates)
+
+    return srcset
@@ -0,0 +1,256 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+from social.backends import (
+    BackendSetting,
+    BaseBackend,
+    LocMemBackend,
+    RedisBackend
+)
+from social.caching import invalidate_posts
+from social.models import Like, Post
+
+DEFAULTS = {
+    "ENABLED": False,
+    "BACKEND": "social.likes.LocMemLikeBuffer",
+    "LOCATION": None,
+    "FLUSH_BATCH_SIZE": 500,
+}
+
+
+LIKE_BUFFER = BackendSetting("SOCIAL_LIKE_BUFFER", DEFAULTS)
+like_buffer_settings = LIKE_BUFFER.get
+get_like_buffer = LIKE_BUFFER.get_backend
+
+
+def is_buffering_enabled():
+    """Whether likes go through the buffer, which must be shared.
+
+    Toggles buffered by a web process have to reach the Celery worker
+    flushing them, so a per-process buffer would never be written.
+    """
+    if not like_buffer_settings()["ENABLED"]:
+        return False
+
+    if not get_like_buffer().shared:
+        raise ImproperlyConfigured(
+            "SOCIAL_LIKE_BUFFER needs a shared BACKEND when ENABLED."
+        )
+
+    return True
+
+
+class BaseLikeBuffer(BaseBackend):
+    """Pending like toggles, counted per (user, post).
+
+    Only the parity of the count matters: an even number of toggles
+    cancels out, an odd number flips whatever is stored in the database.
+    """
+
+    def toggle(self, user_id, post_id):
+        raise NotImplementedError
+
+    def pending_for_user(self, user_id):
+        """Return {post_id: toggle count} of a user's unflushed toggles"""
+        raise NotImplementedError
+
+    def drain(self, max_users):
+        """Remove and return {(user_id, post_id): toggle count}"""
+        raise NotImplementedError
+
+    def requeue(self, toggles):
+        """Put back drained toggles that could not be written"""
+        raise NotImplementedError
+
+
+class LocMemLikeBuffer(LocMemBackend, BaseLikeBuffer):
+    """In-process buffer for tests and single-process development"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending = defaultdict(dict)
+
+    def toggle(self, user_id, post_id):
+        with self._lock:
+            toggles = self._pending[user_id]
+            toggles[post_id] = toggles.get(post_id, 0) + 1
+
+    def pending_for_user(self, user_id):
+        with self._lock:
+            return dict(self._pending.get(user_id, {}))
+
+    def drain(self, max_users):
+        with self._lock:
+            user_ids = list(self._pending)[:max_users]
+            return {
+                (user_id, post_id): count
+                for user_id in user_ids
+                for post_id, count in self._pending.pop(user_id).items()
+            }
+
+    def requeue(self, toggles):
+        with self._lock:
+            for (user_id, post_id), count in toggles.items():
+                pending = self._pending[user_id]
+                pending[post_id] = pending.get(post_id, 0) + count
+
+
+class RedisLikeBuffer(RedisBackend, BaseLikeBuffer):
+    """Buffer kept in one Redis hash per user plus a set of dirty users"""
+
+    DIRTY_KEY = "like-buffer:dirty"
+
+    @staticmethod
+    def _key(user_id):
+        return f"like-buffer:{user_id}"
+
+    def toggle(self, user_id, post_id):
+        pipe = self._client.pipeline()
+        pipe.hincrby(self._key(user_id), post_id, 1)
+        pipe.sadd(self.DIRTY_KEY, user_id)
+        pipe.execute()
+
+    def pending_for_user(self, user_id):
+        return {
+            int(post_id): int(count)
+            for post_id, count in self._client.hgetall(
+                self._key(user_id)
+            ).items()
+        }
+
+    def drain(self, max_users):
+        user_ids = self._client.spop(self.DIRTY_KEY, max_users) or []
+        pipe = self._client.pipeline()
+
+        for user_id in user_ids:
+            pipe.hgetall(self._key(int(user_id)))
+            pipe.delete(self._key(int(user_id)))
+
+        results = pipe.execute()[::2]
+
+        return {
+            (int(user_id), int(post_id)): int(count)
+            for user_id, toggles in zip(user_ids, results)
+            for post_id, count in toggles.items()
+        }
+
+    def requeue(self, toggles):
+        pipe = self._client.pipeline()
+
+        for (user_id, post_id), count in toggles.items():
+            pipe.hincrby(self._key(user_id), post_id, count)
+            pipe.sadd(self.DIRTY_KEY, user_id)
+
+        pipe.execute()
+
+
+def toggle_like(user, post):
+    get_like_buffer().toggle(user.pk, post.pk)
+
+
+def overlay_user_likes(user, queryset):
+    """Apply a user's unflushed toggles to a queryset of their likes.
+
+    Returns the queryset without the likes toggled off, and unsaved Like
+    instances for the ones toggled on.
+    """
+    pending = get_like_buffer().pending_for_user(user.pk)
+    flipped = {post_id for post_id, count in pending.items() if count % 2}
+
+    if not flipped:
+        return queryset, []
+
+    already_liked = set(
+        Like.objects.filter(user=user, post_id__in=flipped)
+        .values_list("post_id", flat=True)
+    )
+    new_likes = [
+        Like(user=user, post=post, is_liked=True)
+        for post in Post.objects.filter(pk__in=flipped - already_liked)
+    ]
+
+    return queryset.exclude(post_id__in=flipped), new_likes
+
+
+def _shift_likes_counts(deltas):
+    by_delta = defaultdict(list)
+
+    for post_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(post_id)
+
+    for delta, post_ids in by_delta.items():
+        Post.objects.filter(pk__in=post_ids).update(
+            likes_count=F("likes_count") + delta
+        )
+
+
+def apply_toggles(toggles):
+    """Write the net effect of drained toggles with bulk statements"""
+    flipped = {key for key, count in toggles.items() if count % 2}
+
+    if not flipped:
+        return 0
+
+    user_ids = set(get_user_model().objects.filter(
+        pk__in={user_id for user_id, _ in flipped}
+    ).values_list("pk", flat=True))
+    post_ids = set(Post.objects.filter(
+        pk__in={post_id for _, post_id in flipped}
+    ).values_list("pk", flat=True))
+
+    with transaction.atomic():
+        existing = {
+            (user_id, post_id): like_id
+            for like_id, user_id, post_id in Like.objects.filter(
+                user_id__in=user_ids, post_id__in=post_ids
+            ).values_list("id", "user_id", "post_id")
+            if (user_id, post_id) in flipped
+        }
+        to_create = [
+            Like(user_id=user_id, post_id=post_id, is_liked=True)
+            for user_id, post_id in flipped - existing.keys()
+            if user_id in user_ids and post_id in post_ids
+        ]
+        deltas = defaultdict(int)
+
+        Like.objects.filter(pk__in=existing.values()).delete()
+        for _, post_id in existing:
+            deltas[post_id] -= 1
+
+        Like.objects.bulk_create(to_create, ignore_conflicts=True)
+        for like in to_create:
+            deltas[like.post_id] += 1
+
+        _shift_likes_counts(deltas)
+
+    transaction.on_commit(lambda: invalidate_posts(deltas))
+
+    return len(existing) + len(to_create)
+
+
+def flush_like_buffer():
+    """Drain the buffer in batches until it is empty.
+
+    A batch the database rejects is put back before the error is raised,
+    to be written by the next flush.
+    """
+    options = like_buffer_settings()
+    buffer = get_like_buffer()
+    written = 0
+
+    while True:
+        toggles = buffer.drain(options["FLUSH_BATCH_SIZE"])
+
+        if not toggles:
+            return written
+
+        try:
+            written += apply_toggles(toggles)
+        except DatabaseError:
+            buffer.requeue(toggles)
+            raise
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from social.benchmarks import format_ms, obtain_token, run_load
+
+ENDPOINTS = {
+    "feed": "/api/social/posts/",
+    "post-detail": "/api/social/posts/{post_id}/",
+    "user-detail": "/api/user/all/{user_id}/",
+    "liked-posts": "/api/user/liked-posts/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and latency of the read endpoints on running "
+        "servers, e.g. uvicorn with ASYNC_VIEWS=1 against the WSGI app"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            help="NAME=BASE_URL of a running server, repeatable "
+                 "(ex. --target asgi=http://127.0.0.1:8001)"
+        )
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--post-id", type=int, required=True)
+        parser.add_argument("--user-id", type=int, required=True)
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 10, 50]
+        )
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        targets = []
+
+        for target in options["target"]:
+            name, sep, base_url = target.partition("=")
+
+            if not sep:
+                raise CommandError(f"Expected NAME=BASE_URL, got {target}")
+
+            targets.append((name, base_url.rstrip("/")))
+
+        self.stdout.write(
+            f"{'target':<10} {'endpoint':<12} {'conc':>5} {'req/s':>9} "
+            f"{'p50 ms':>9} {'p99 ms':>9} {'429s':>7} {'errors':>7}"
+        )
+
+        for name, base_url in targets:
+            token = obtain_token(
+                base_url, options["email"], options["password"]
+            )
+
+            for endpoint, path in ENDPOINTS.items():
+                url = base_url + path.format(
+                    post_id=options["post_id"], user_id=options["user_id"]
+                )
+
+                for concurrency in options["concurrency"]:
+                    stats = run_load(
+                        url, token, options["requests"], concurrency
+                    )
+                    self.stdout.write(
+                        f"{name:<10} {endpoint:<12} {concurrency:>5} "
+                        f"{stats['requests_per_second']:>9.1f} "
+                        f"{format_ms(stats['p50_ms'])} "
+                        f"{format_ms(stats['p99_ms'])} "
+                        f"{stats['throttled']:>7} {stats['errors']:>7}"
+                    )
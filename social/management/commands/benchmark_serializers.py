@@ -0,0 +1,131 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from social.models import Comment, Like, Post
+from social.serializers import (
+    CommentListSerializer,
+    FastCommentListSerializer,
+    FastLikeListSerializer,
+    FastPostListSerializer,
+    LikeListSerializer,
+    PostListSerializer
+)
+from user.serializers import FastUserListSerializer, UserListSerializer
+
+
+def _serializers():
+    """name: (queryset the views use, DRF serializer, fast twin)"""
+    return {
+        "posts": (
+            Post.objects.select_related("created_by"),
+            PostListSerializer,
+            FastPostListSerializer
+        ),
+        "users": (
+            get_user_model().objects.all(),
+            UserListSerializer,
+            FastUserListSerializer
+        ),
+        "likes": (
+            Like.objects.select_related("post"),
+            LikeListSerializer,
+            FastLikeListSerializer
+        ),
+        "comments": (
+            Comment.objects.select_related("post"),
+            CommentListSerializer,
+            FastCommentListSerializer
+        ),
+    }
+
+
+def _best_of(repeat, render):
+    best = None
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        content = render()
+        seconds = time.perf_counter() - started_at
+        best = seconds if best is None else min(best, seconds)
+
+    return content, best
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that the values-based list serializers render the same JSON "
+        "bytes as their DRF twins, and compare their rows per second"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--serializer",
+            action="append",
+            choices=list(_serializers()),
+            help="Only check these serializers, repeatable"
+        )
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host of the request that absolute image URLs are built for"
+        )
+
+    def handle(self, *args, **options):
+        request = Request(
+            RequestFactory().get("/", HTTP_HOST=options["host"])
+        )
+        context = {"request": request}
+        renderer = JSONRenderer()
+        mismatches = []
+
+        self.stdout.write(
+            f"{'serializer':<10} {'rows':>6} {'drf rows/s':>11} "
+            f"{'fast rows/s':>12} {'speedup':>8}"
+        )
+
+        for name, (queryset, serializer_class, fast_class) in (
+            _serializers().items()
+        ):
+            if options["serializer"] and name not in options["serializer"]:
+                continue
+
+            queryset = queryset.order_by("pk")[:options["rows"]]
+
+            def render_drf():
+                serializer = serializer_class(
+                    queryset.all(), many=True, context=context
+                )
+                return renderer.render(serializer.data)
+
+            def render_fast():
+                serializer = fast_class(context)
+                rows = serializer.values(queryset.all())
+                return renderer.render(serializer.serialize(rows))
+
+            expected, drf_seconds = _best_of(options["repeat"], render_drf)
+            content, fast_seconds = _best_of(options["repeat"], render_fast)
+
+            if content != expected:
+                mismatches.append(name)
+
+            rows = queryset.count()
+            self.stdout.write(
+                f"{name:<10} {rows:>6} {rows / drf_seconds:>11.0f} "
+                f"{rows / fast_seconds:>12.0f} "
+                f"{drf_seconds / fast_seconds:>7.1f}x"
+            )
+
+        if mismatches:
+            raise CommandError(
+                "Output differs from the DRF serializer for: "
+                + ", ".join(mismatches)
+            )
+
+        self.stdout.write(self.style.SUCCESS("Output is byte-identical"))
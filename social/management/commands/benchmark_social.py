@@ -0,0 +1,226 @@
+import json
+import math
+from collections import Counter
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from rest_framework.settings import api_settings
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social.benchmarks import format_ms, run_requests
+from social.models import Comment, Like, Post
+from social.seeding import SEED_EMAIL_DOMAIN
+
+ENDPOINTS = {
+    "feed": ("GET", "/api/social/posts/"),
+    "post-detail": ("GET", "/api/social/posts/{post_id}/"),
+    "user-detail": ("GET", "/api/user/all/{user_id}/"),
+    "like": ("POST", "/api/social/posts/{post_id}/like/"),
+    "follow": ("PATCH", "/api/user/all/{user_id}/follow/"),
+}
+# Scoped rates the endpoints count against, besides the user rate
+THROTTLE_SCOPES = {"like": "like"}
+
+
+def _targets(user_count, posts_per_user):
+    """Seeded users, each with posts of their feed and accounts to visit"""
+    users = list(
+        get_user_model().objects.filter(
+            email__endswith=f"@{SEED_EMAIL_DOMAIN}"
+        ).order_by("pk")[:user_count]
+    )
+    targets = []
+
+    for index, user in enumerate(users):
+        post_ids = list(
+            Post.objects.filter(
+                Q(created_by=user) | Q(created_by__followers=user)
+            ).order_by("-created_at").values_list("pk", flat=True)
+            [:posts_per_user]
+        )
+
+        if post_ids:
+            targets.append({
+                "user": user,
+                "post_ids": post_ids,
+                "other_id": users[(index + 1) % len(users)].pk,
+            })
+
+    return targets
+
+
+def _exceeded_rates(endpoints, requests_per_user):
+    """Throttle rates a run would go over, as (scope, requests, rate)"""
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    counts = Counter()
+
+    for endpoint in endpoints:
+        counts["user"] += requests_per_user
+
+        if endpoint in THROTTLE_SCOPES:
+            counts[THROTTLE_SCOPES[endpoint]] += requests_per_user
+
+    for scope, count in counts.items():
+        rate = rates.get(scope)
+
+        if rate and count > UserRateThrottle().parse_rate(rate)[0]:
+            yield scope, count, rate
+
+
+def _compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {
+            (result["endpoint"], result["concurrency"]): result
+            for result in json.load(baseline_file)["results"]
+        }
+
+    for result in results:
+        before = baseline.get((result["endpoint"], result["concurrency"]))
+
+        if before is None:
+            continue
+
+        yield result, {
+            key: (result[key] - before[key]) / before[key] * 100
+            for key in ("requests_per_second", "p50_ms", "p99_ms")
+            if before.get(key) and result[key] is not None
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and p50/p99 latency of the feed, post detail, "
+        "user detail, like and follow endpoints of a running server "
+        "seeded with seed_social, and save the results as JSON. Latencies "
+        "only count 2xx responses; throttled ones are reported apart. "
+        "Tokens are signed here, so the server needs the same SECRET_KEY"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Seeded users to spread the requests over, so that each "
+                 "stays within the throttle rates"
+        )
+        parser.add_argument(
+            "--endpoint", action="append", choices=list(ENDPOINTS)
+        )
+        parser.add_argument(
+            "--concurrency", type=int, nargs="+", default=[1, 10, 50]
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--output",
+            help="JSON file for the results "
+                 "(default: benchmark-<timestamp>.json)"
+        )
+        parser.add_argument(
+            "--baseline", help="Earlier results JSON to compare against"
+        )
+
+    def handle(self, *args, **options):
+        started_at = datetime.now()
+        base_url = options["base_url"].rstrip("/")
+        targets = _targets(options["users"], posts_per_user=20)
+
+        if not targets:
+            raise CommandError(
+                "No seeded users with posts found, run seed_social first"
+            )
+
+        endpoints = options["endpoint"] or list(ENDPOINTS)
+        requests_per_user = math.ceil(
+            options["requests"] * len(options["concurrency"]) / len(targets)
+        )
+
+        for scope, count, rate in _exceeded_rates(
+            endpoints, requests_per_user
+        ):
+            self.stderr.write(self.style.WARNING(
+                f"Each user sends up to {count} requests counted against "
+                f"the {scope} rate of {rate}, expect throttled responses. "
+                "Spread them over more --users or send fewer --requests."
+            ))
+
+        # Logging in over HTTP would spend the anon rate on every run
+        for target in targets:
+            target["token"] = str(AccessToken.for_user(target["user"]))
+
+        def request_for(method, path):
+            def request(index):
+                target = targets[index % len(targets)]
+                post_ids = target["post_ids"]
+                url = base_url + path.format(
+                    post_id=post_ids[index // len(targets) % len(post_ids)],
+                    user_id=target["other_id"]
+                )
+
+                return url, target["token"], method
+
+            return request
+
+        results = []
+        self.stdout.write(
+            f"{'endpoint':<12} {'conc':>5} {'req/s':>9} {'p50 ms':>9} "
+            f"{'p99 ms':>9} {'429s':>7} {'errors':>7}"
+        )
+
+        for endpoint in endpoints:
+            method, path = ENDPOINTS[endpoint]
+
+            for concurrency in options["concurrency"]:
+                stats = run_requests(
+                    request_for(method, path),
+                    options["requests"],
+                    concurrency
+                )
+                results.append({
+                    "endpoint": endpoint, "method": method, **stats
+                })
+                self.stdout.write(
+                    f"{endpoint:<12} {concurrency:>5} "
+                    f"{stats['requests_per_second']:>9.1f} "
+                    f"{format_ms(stats['p50_ms'])} "
+                    f"{format_ms(stats['p99_ms'])} "
+                    f"{stats['throttled']:>7} {stats['errors']:>7}"
+                )
+
+        report = {
+            "created_at": started_at.isoformat(timespec="seconds"),
+            "base_url": base_url,
+            "users": len(targets),
+            "dataset": {
+                "users": get_user_model().objects.count(),
+                "follows": get_user_model().followers.through.objects.count(),
+                "posts": Post.objects.count(),
+                "comments": Comment.objects.count(),
+                "likes": Like.objects.count(),
+            },
+            "results": results,
+        }
+        output = options["output"] or (
+            f"benchmark-{started_at:%Y%m%d-%H%M%S}.json"
+        )
+
+        with open(output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+        if options["baseline"]:
+            self.stdout.write(f"\nChange from {options['baseline']}:")
+
+            for result, change in _compare(results, options["baseline"]):
+                self.stdout.write(
+                    f"{result['endpoint']:<12} {result['concurrency']:>5} "
+                    + " ".join(
+                        f"{key} {value:+.1f}%"
+                        for key, value in change.items()
+                    )
+                )
+
+        self.stdout.write(self.style.SUCCESS(f"Results saved to {output}"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from social.tasks import reconcile_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recount post likes/comments and repair drifted counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        repaired = reconcile_post_counters(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired counters on {repaired} posts")
+        )
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from social.seeding import SEED_EMAIL_DOMAIN, seed_social
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, a power-law follow graph, "
+        "posts, comments and likes for load testing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--follows-per-user", type=float, default=20)
+        parser.add_argument("--posts-per-user", type=float, default=10)
+        parser.add_argument("--comments-per-post", type=float, default=3)
+        parser.add_argument("--likes-per-user", type=float, default=30)
+        parser.add_argument(
+            "--exponent",
+            type=float,
+            default=1.0,
+            help="Zipf exponent of account and post popularity"
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--password", default="password")
+        parser.add_argument(
+            "--seed", type=int, help="Random seed, for a repeatable dataset"
+        )
+
+    def _report(self, name, rows, started_at):
+        seconds = time.perf_counter() - started_at
+        self.stdout.write(
+            f"{name:<10} {rows:>10} rows in {seconds:>7.1f}s "
+            f"({rows / seconds if seconds else 0:,.0f} rows/s)"
+        )
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        step_started_at = started_at
+        steps = seed_social(
+            options["users"],
+            options["follows_per_user"],
+            options["posts_per_user"],
+            options["comments_per_post"],
+            options["likes_per_user"],
+            exponent=options["exponent"],
+            chunk_size=options["chunk_size"],
+            password=options["password"],
+            seed=options["seed"]
+        )
+
+        for name, rows in steps:
+            self._report(name, rows, step_started_at)
+            step_started_at = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started_at:.1f}s, log in as "
+            f"user<N>@{SEED_EMAIL_DOMAIN} with the password "
+            f"{options['password']!r}"
+        ))
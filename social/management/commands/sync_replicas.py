@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from social.db_router import replica_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the replica files, "
+        "standing in for replication during local development"
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+
+        if primary.vendor != "sqlite":
+            raise CommandError("Only SQLite replicas can be synced locally")
+
+        primary.ensure_connection()
+
+        for alias in replica_settings()["REPLICAS"]:
+            replica = connections[alias]
+            replica.ensure_connection()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(self.style.SUCCESS(f"Synced {alias}"))
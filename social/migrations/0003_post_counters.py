@@ -0,0 +1,49 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:24
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model("social", "Post")
+    Comment = apps.get_model("social", "Comment")
+    Like = apps.get_model("social", "Like")
+
+    Post.objects.update(
+        comments_count=_count_subquery(Comment),
+        likes_count=_count_subquery(Like),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social", "0003_post_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="post_author_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:28
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of social.hashtags.parse_hashtags at the time of this migration
+HASHTAG_FIELD_RE = re.compile(r"\w+")
+CONTENT_HASHTAG_RE = re.compile(r"(?<!\w)#(\w+)")
+MAX_LENGTH = 63
+
+
+def parse_hashtags(hashtag, content):
+    names = HASHTAG_FIELD_RE.findall(hashtag or "")
+    names += CONTENT_HASHTAG_RE.findall(content or "")
+
+    return list(
+        dict.fromkeys(name.lstrip("#").lower()[:MAX_LENGTH] for name in names)
+    )
+
+
+def backfill_hashtags(apps, schema_editor):
+    Post = apps.get_model("social", "Post")
+    Hashtag = apps.get_model("social", "Hashtag")
+    through = Post.tags.through
+    ids_by_name = {}
+
+    for post in Post.objects.only("hashtag", "content").iterator():
+        names = parse_hashtags(post.hashtag, post.content)
+
+        for name in names:
+            if name not in ids_by_name:
+                ids_by_name[name] = Hashtag.objects.get_or_create(name=name)[0].id
+
+        through.objects.bulk_create(
+            [through(post_id=post.id, hashtag_id=ids_by_name[name]) for name in names]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social", "0004_post_author_created_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Hashtag",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=63, unique=True)),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="tags",
+            field=models.ManyToManyField(
+                blank=True, related_name="posts", to="social.hashtag"
+            ),
+        ),
+        migrations.RunPython(backfill_hashtags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+from django.db import migrations
+
+# Frozen copy of the statements social.search used at the time of this
+# migration
+
+SQLITE_FTS_TABLE = "social_post_fts"
+
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        title, content,
+        content='social_post', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai
+    AFTER INSERT ON social_post BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad
+    AFTER DELETE ON social_post BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(
+            {SQLITE_FTS_TABLE}, rowid, title, content
+        )
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+    AFTER UPDATE OF title, content ON social_post BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(
+            {SQLITE_FTS_TABLE}, rowid, title, content
+        )
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, content)
+        VALUES (new.id, new.title, new.content);
+    END
+    """,
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL_SQL = [
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+]
+
+POSTGRES_INSTALL_SQL = [
+    """
+    ALTER TABLE social_post ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS social_post_search_vector_idx
+    ON social_post USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_UNINSTALL_SQL = [
+    "DROP INDEX IF EXISTS social_post_search_vector_idx",
+    "ALTER TABLE social_post DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def _execute(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def install(apps, schema_editor):
+    _execute(
+        schema_editor,
+        {"sqlite": SQLITE_INSTALL_SQL, "postgresql": POSTGRES_INSTALL_SQL}
+    )
+
+
+def uninstall(apps, schema_editor):
+    _execute(
+        schema_editor,
+        {"sqlite": SQLITE_UNINSTALL_SQL, "postgresql": POSTGRES_UNINSTALL_SQL}
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social", "0005_hashtag"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
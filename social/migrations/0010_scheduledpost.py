@@ -0,0 +1,74 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("social", "0009_chunkedupload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduledPost",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hashtag", models.CharField(max_length=63)),
+                ("title", models.CharField(max_length=63)),
+                ("content", models.TextField()),
+                ("publish_at", models.DateTimeField()),
+                (
+                    "claim_token",
+                    models.UUIDField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "published_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scheduled_posts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "post",
+                    models.OneToOneField(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="scheduled_post",
+                        to="social.post",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["publish_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("published_at__isnull", True)),
+                        fields=["publish_at"],
+                        name="scheduledpost_due_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("social", "0010_scheduledpost"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataExport",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("complete", "Complete"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=8,
+                    ),
+                ),
+                (
+                    "section",
+                    models.CharField(blank=True, editable=False, max_length=16),
+                ),
+                ("last_pk", models.PositiveBigIntegerField(default=0, editable=False)),
+                ("offset", models.PositiveBigIntegerField(default=0, editable=False)),
+                ("rows", models.PositiveBigIntegerField(default=0, editable=False)),
+                (
+                    "claim_token",
+                    models.UUIDField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "claimed_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                ("archive", models.FileField(blank=True, editable=False, upload_to="")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "completed_at",
+                    models.DateTimeField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="data_exports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
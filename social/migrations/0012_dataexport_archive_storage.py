@@ -0,0 +1,23 @@
+# Generated by Django 4.2.4 on 2026-10-18 05:49
+
+from django.db import migrations, models
+import social.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("social", "0011_dataexport"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dataexport",
+            name="archive",
+            field=models.FileField(
+                blank=True,
+                editable=False,
+                storage=social.models.DataExportStorage(),
+                upload_to="",
+            ),
+        ),
+    ]
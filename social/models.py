@@ -2,7 +2,9 @@ import os
 import uuid
 
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
 
@@ -13,28 +15,59 @@ def post_image_file_path(instance, filename):
     return os.path.join("uploads", "posts", filename)
 
 
+class DataExportStorage(FileSystemStorage):
+    """Files under DATA_EXPORT_DIR, which is never served as media"""
+
+    @cached_property
+    def base_location(self):
+        return settings.DATA_EXPORT_DIR
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+
+        if setting == "DATA_EXPORT_DIR":
+            self.__dict__.pop("base_location", None)
+            self.__dict__.pop("location", None)
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=63, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
 class Post(models.Model):
     hashtag = models.CharField(max_length=63)
+    tags = models.ManyToManyField(
+        Hashtag,
+        related_name="posts",
+        blank=True
+    )
     title = models.CharField(max_length=63)
     content = models.TextField()
     image = models.ImageField(null=True, upload_to=post_image_file_path)
+    image_variants = models.JSONField(default=dict, editable=False)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name="posts",
         on_delete=models.CASCADE
     )
     created_at = models.DateTimeField(auto_now_add=True)
-
-    @property
-    def comments_count(self):
-        return self.comments.count()
-
-    @property
-    def likes_count(self):
-        return self.likes.count()
+    comments_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["created_by", "created_at", "id"],
+                name="post_author_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -56,6 +89,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["post", "created_at", "id"],
+                name="comment_post_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user}: {self.content}"
@@ -76,3 +115,152 @@ class Like(models.Model):
 
     class Meta:
         unique_together = ("user", "post")
+
+
+class ScheduledPost(models.Model):
+    hashtag = models.CharField(max_length=63)
+    title = models.CharField(max_length=63)
+    content = models.TextField()
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="scheduled_posts",
+        on_delete=models.CASCADE
+    )
+    publish_at = models.DateTimeField()
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    post = models.OneToOneField(
+        Post,
+        null=True,
+        blank=True,
+        related_name="scheduled_post",
+        on_delete=models.SET_NULL,
+        editable=False
+    )
+    published_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        ordering = ["publish_at"]
+        indexes = [
+            models.Index(
+                fields=["publish_at"],
+                condition=models.Q(published_at__isnull=True),
+                name="scheduledpost_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.title} at {self.publish_at}"
+
+
+class ChunkedUpload(models.Model):
+    TARGET_POST = "post"
+    TARGET_USER = "user"
+    TARGET_CHOICES = [
+        (TARGET_POST, "Post image"),
+        (TARGET_USER, "User image"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_COMPLETE = "complete"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_COMPLETE, "Complete"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="chunked_uploads",
+        on_delete=models.CASCADE
+    )
+    target = models.CharField(max_length=7, choices=TARGET_CHOICES)
+    post = models.ForeignKey(
+        Post,
+        null=True,
+        blank=True,
+        related_name="chunked_uploads",
+        on_delete=models.CASCADE
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64)
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=8,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{self.id}.part")
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class DataExport(models.Model):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETE = "complete"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETE, "Complete"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="data_exports",
+        on_delete=models.CASCADE
+    )
+    status = models.CharField(
+        max_length=8,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING
+    )
+    # Checkpoint: the archive holds ``offset`` bytes, written up to row
+    # ``last_pk`` of ``section``
+    section = models.CharField(max_length=16, blank=True, editable=False)
+    last_pk = models.PositiveBigIntegerField(default=0, editable=False)
+    offset = models.PositiveBigIntegerField(default=0, editable=False)
+    rows = models.PositiveBigIntegerField(default=0, editable=False)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    archive = models.FileField(
+        blank=True,
+        editable=False,
+        storage=DataExportStorage()
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    @property
+    def archive_name(self):
+        return f"{self.id}.ndjson.gz"
+
+    @property
+    def partial_path(self):
+        return self.archive.storage.path(f"{self.archive_name}.part")
+
+    def __str__(self):
+        return f"Export of {self.user} ({self.status})"
@@ -0,0 +1,108 @@
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from social.hashtags import sync_post_hashtags
+from social.models import Post, ScheduledPost
+
+# A claim older than this is treated as abandoned by a crashed worker
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def _due(now):
+    return ScheduledPost.objects.filter(
+        published_at__isnull=True, publish_at__lte=now
+    ).order_by("publish_at", "id")
+
+
+def _publish(scheduled_ids, now, token):
+    """Publish the scheduled posts still claimed with ``token``.
+
+    The rows are marked published with one conditional UPDATE before any
+    post is created. A worker that ran past CLAIM_TIMEOUT, and whose
+    batch was claimed again by another one, marks nothing and publishes
+    nothing: only the rows it updated get a post (and a fan-out).
+    """
+    marked = ScheduledPost.objects.filter(
+        pk__in=scheduled_ids, claim_token=token, published_at__isnull=True
+    ).update(published_at=now)
+
+    if not marked:
+        return []
+
+    scheduled_posts = list(ScheduledPost.objects.filter(
+        pk__in=scheduled_ids, claim_token=token, published_at=now
+    ))
+    posts = Post.objects.bulk_create([
+        Post(
+            hashtag=scheduled.hashtag,
+            title=scheduled.title,
+            content=scheduled.content,
+            created_by_id=scheduled.created_by_id,
+        )
+        for scheduled in scheduled_posts
+    ])
+    sync_post_hashtags(posts)
+
+    for scheduled, post in zip(scheduled_posts, posts):
+        scheduled.post = post
+
+    ScheduledPost.objects.bulk_update(scheduled_posts, ["post"])
+
+    return posts
+
+
+def _publish_locked_batch(batch_size, now):
+    """Claim rows with SELECT ... FOR UPDATE SKIP LOCKED (Postgres)"""
+    token = uuid.uuid4()
+
+    with transaction.atomic():
+        batch = list(
+            _due(now).select_for_update(skip_locked=True)
+            .values_list("pk", flat=True)[:batch_size]
+        )
+
+        if not batch:
+            return []
+
+        ScheduledPost.objects.filter(pk__in=batch).update(
+            claim_token=token, claimed_at=now
+        )
+
+        return _publish(batch, now, token)
+
+
+def _publish_claimed_batch(batch_size, now):
+    """Claim rows by stamping them with a token in a single UPDATE"""
+    token = uuid.uuid4()
+    claimable = _due(now).filter(
+        Q(claim_token__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT)
+    )
+    claimed = ScheduledPost.objects.filter(
+        pk__in=claimable.values("pk")[:batch_size]
+    ).filter(
+        Q(claim_token__isnull=True) | Q(claimed_at__lt=now - CLAIM_TIMEOUT)
+    ).update(claim_token=token, claimed_at=now)
+
+    if not claimed:
+        return []
+
+    batch = list(ScheduledPost.objects.filter(
+        claim_token=token, published_at__isnull=True
+    ).values_list("pk", flat=True))
+
+    with transaction.atomic():
+        return _publish(batch, now, token)
+
+
+def publish_due_batch(batch_size):
+    """Publish up to ``batch_size`` due posts, safe to run concurrently"""
+    now = timezone.now()
+
+    if connection.features.has_select_for_update_skip_locked:
+        return _publish_locked_batch(batch_size, now)
+
+    return _publish_claimed_batch(batch_size, now)
@@ -0,0 +1,119 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from social.models import Post
+
+SEARCH_TERM_RE = re.compile(r"\w+")
+
+# Created with its triggers by migration 0006. SQLite drops the
+# triggers whenever a migration rebuilds social_post, so such migrations
+# have to create them again (see 0008).
+SQLITE_FTS_TABLE = "social_post_fts"
+
+# Visibility mirrors PostViewSet.get_queryset: own posts and followed users.
+VISIBILITY_SQL = """
+    (p.created_by_id = %s OR p.created_by_id IN (
+        SELECT from_user_id FROM user_user_followers WHERE to_user_id = %s
+    ))
+"""
+
+SQLITE_SEARCH_SQL = f"""
+    SELECT p.id, -bm25({SQLITE_FTS_TABLE}, 2.0, 1.0) AS score
+    FROM {SQLITE_FTS_TABLE}
+    JOIN social_post p ON p.id = {SQLITE_FTS_TABLE}.rowid
+    WHERE {SQLITE_FTS_TABLE} MATCH %s AND {VISIBILITY_SQL}
+"""
+
+POSTGRES_SEARCH_SQL = f"""
+    SELECT p.id, ts_rank_cd(p.search_vector, query)::float8 AS score
+    FROM social_post p, plainto_tsquery('english', %s) query
+    WHERE p.search_vector @@ query AND {VISIBILITY_SQL}
+"""
+
+
+class PostSearch:
+    """Ranked full-text search over the posts visible to a user"""
+
+    def __init__(self, user, query):
+        self.user = user
+        self.terms = SEARCH_TERM_RE.findall(query or "")
+
+    def _match_param(self):
+        if connection.vendor == "sqlite":
+            return " ".join(f'"{term}"' for term in self.terms)
+
+        return " ".join(self.terms)
+
+    def _search_sql(self):
+        return {
+            "sqlite": SQLITE_SEARCH_SQL,
+            "postgresql": POSTGRES_SEARCH_SQL,
+        }.get(connection.vendor)
+
+    def _unranked_page(self, limit, after):
+        """Newest posts containing every term, without a full-text index"""
+        user = self.user
+        posts = Post.objects.filter(
+            Q(created_by=user) | Q(created_by__in=user.follows.all())
+        )
+
+        for term in self.terms:
+            posts = posts.filter(
+                Q(title__icontains=term) | Q(content__icontains=term)
+            )
+
+        if after is not None:
+            posts = posts.filter(pk__lt=after[1])
+
+        results = list(
+            posts.select_related("created_by").order_by("-id")[:limit]
+        )
+
+        for post in results:
+            post.search_rank = 0.0
+
+        return results
+
+    def page(self, limit, after=None):
+        """Return up to ``limit`` posts ranked best first.
+
+        ``after`` is the (score, id) of the last post of the previous page.
+        Each post gets a ``search_rank`` attribute. Databases without a
+        full-text index get unranked substring matches instead.
+        """
+        if not self.terms:
+            return []
+
+        search_sql = self._search_sql()
+
+        if search_sql is None:
+            return self._unranked_page(limit, after)
+
+        sql = f"SELECT id, score FROM ({search_sql}) ranked"
+        params = [self._match_param(), self.user.pk, self.user.pk]
+
+        if after is not None:
+            score, pk = after
+            sql += " WHERE score < %s OR (score = %s AND id < %s)"
+            params += [score, score, pk]
+
+        sql += " ORDER BY score DESC, id DESC LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            ranked = cursor.fetchall()
+
+        posts = Post.objects.select_related("created_by").in_bulk(
+            [pk for pk, _ in ranked]
+        )
+        results = []
+
+        for pk, score in ranked:
+            if pk in posts:
+                posts[pk].search_rank = score
+                results.append(posts[pk])
+
+        return results
@@ -0,0 +1,251 @@
+import random
+from collections import Counter, defaultdict
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from social.hashtags import sync_post_hashtags
+from social.models import Comment, Like, Post
+
+SEED_EMAIL_DOMAIN = "seed.example.com"
+
+# Shape of the heavy-tailed per-user counts: a Pareto distribution with
+# this alpha has a finite mean but no finite variance
+PARETO_ALPHA = 2.0
+
+WORDS = (
+    "photo", "weekend", "coffee", "city", "music", "release", "team",
+    "morning", "trip", "idea", "review", "launch", "sunset", "game",
+    "project", "recipe", "story", "update", "question", "thanks",
+)
+HASHTAGS = (
+    "python", "django", "travel", "food", "music", "sport", "news", "art",
+    "tech", "photo", "books", "movies", "science", "nature", "fitness",
+)
+
+
+def heavy_tailed(mean, rng):
+    """A non-negative int from a Pareto distribution with the given mean"""
+    scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+
+    return round(scale * rng.paretovariate(PARETO_ALPHA))
+
+
+class PopularitySampler:
+    """Draws ids with Zipf-like popularity.
+
+    Ids are ranked in random order and the one at rank r is drawn with
+    probability proportional to 1 / r ** exponent, so a few accounts
+    or posts collect most of the follows and likes.
+    """
+
+    def __init__(self, ids, exponent, rng):
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.ids) + 1)
+        ))
+        self.rng = rng
+
+    def sample(self, count, exclude=None, attempts=5):
+        """Up to ``count`` distinct ids, never ``exclude``"""
+        picked = set()
+        count = min(count, len(self.ids) - (exclude is not None))
+
+        # Popular ids come up again and again; give up on the long tail
+        # after a few rounds rather than loop until every draw is new.
+        for _ in range(attempts):
+            missing = count - len(picked)
+
+            if missing <= 0:
+                break
+
+            picked.update(self.rng.choices(
+                self.ids, cum_weights=self.cum_weights, k=missing
+            ))
+            picked.discard(exclude)
+
+        return list(picked)
+
+
+def _text(rng, words):
+    return " ".join(rng.choices(WORDS, k=words))
+
+
+def _bulk_insert(model, objects, chunk_size):
+    """bulk_create ``objects`` a chunk at a time, yielding each chunk"""
+    objects = iter(objects)
+
+    while chunk := list(islice(objects, chunk_size)):
+        with transaction.atomic():
+            yield model.objects.bulk_create(chunk)
+
+
+def _set_counters(model, field, counts, chunk_size):
+    """Store counts with one UPDATE per distinct value (and chunk)"""
+    by_count = defaultdict(list)
+
+    for pk, count in counts.items():
+        if count:
+            by_count[count].append(pk)
+
+    for count, pks in by_count.items():
+        for start in range(0, len(pks), chunk_size):
+            model.objects.filter(pk__in=pks[start:start + chunk_size]).update(
+                **{field: count}
+            )
+
+
+def seed_users(count, password, chunk_size):
+    """Create ``count`` users sharing one password hash, return their ids"""
+    user_model = get_user_model()
+    start = user_model.objects.filter(
+        email__endswith=f"@{SEED_EMAIL_DOMAIN}"
+    ).count()
+    # Hashing is deliberately slow; one hash serves every seeded user
+    password = make_password(password)
+    users = (
+        user_model(
+            email=f"user{index}@{SEED_EMAIL_DOMAIN}",
+            email_lower=f"user{index}@{SEED_EMAIL_DOMAIN}",
+            username=f"seed_user{index}",
+            username_lower=f"seed_user{index}",
+            first_name="Seed",
+            last_name=f"User {index}",
+            password=password,
+        )
+        for index in range(start, start + count)
+    )
+
+    return [
+        user.pk
+        for chunk in _bulk_insert(user_model, users, chunk_size)
+        for user in chunk
+    ]
+
+
+def seed_follows(user_ids, per_user, sampler, chunk_size, rng):
+    """Make every user follow a heavy-tailed number of popular accounts"""
+    user_model = get_user_model()
+    through = user_model.followers.through
+    followers = Counter()
+    followings = Counter()
+
+    def follows():
+        for follower_id in user_ids:
+            followed_ids = sampler.sample(
+                heavy_tailed(per_user, rng), exclude=follower_id
+            )
+            followings[follower_id] = len(followed_ids)
+            followers.update(followed_ids)
+
+            for followed_id in followed_ids:
+                yield through(from_user_id=followed_id, to_user_id=follower_id)
+
+    created = sum(
+        len(chunk) for chunk in _bulk_insert(through, follows(), chunk_size)
+    )
+    _set_counters(user_model, "followers_count", followers, chunk_size)
+    _set_counters(user_model, "followings_count", followings, chunk_size)
+
+    return created
+
+
+def seed_posts(user_ids, per_user, chunk_size, rng):
+    """Create a heavy-tailed number of posts per user, return their ids"""
+    posts = (
+        Post(
+            hashtag=rng.choice(HASHTAGS),
+            title=_text(rng, 3).capitalize(),
+            content=f"{_text(rng, 20)} #{rng.choice(HASHTAGS)}",
+            created_by_id=user_id,
+        )
+        for user_id in user_ids
+        for _ in range(heavy_tailed(per_user, rng))
+    )
+    post_ids = []
+
+    for chunk in _bulk_insert(Post, posts, chunk_size):
+        sync_post_hashtags(chunk)
+        post_ids.extend(post.pk for post in chunk)
+
+    return post_ids
+
+
+def seed_comments(post_ids, user_ids, per_post, chunk_size, rng):
+    comments_counts = Counter()
+
+    def comments():
+        for post_id in post_ids:
+            comments_counts[post_id] = heavy_tailed(per_post, rng)
+
+            for _ in range(comments_counts[post_id]):
+                yield Comment(
+                    post_id=post_id,
+                    user_id=rng.choice(user_ids),
+                    content=_text(rng, 8),
+                )
+
+    created = sum(
+        len(chunk) for chunk in _bulk_insert(Comment, comments(), chunk_size)
+    )
+    _set_counters(Post, "comments_count", comments_counts, chunk_size)
+
+    return created
+
+
+def seed_likes(user_ids, per_user, sampler, chunk_size, rng):
+    """Make every user like a heavy-tailed number of popular posts"""
+    likes_counts = Counter()
+
+    def likes():
+        for user_id in user_ids:
+            post_ids = sampler.sample(heavy_tailed(per_user, rng))
+            likes_counts.update(post_ids)
+
+            for post_id in post_ids:
+                yield Like(user_id=user_id, post_id=post_id, is_liked=True)
+
+    created = sum(
+        len(chunk) for chunk in _bulk_insert(Like, likes(), chunk_size)
+    )
+    _set_counters(Post, "likes_count", likes_counts, chunk_size)
+
+    return created
+
+
+def seed_social(
+    users,
+    follows_per_user,
+    posts_per_user,
+    comments_per_post,
+    likes_per_user,
+    exponent=1.0,
+    chunk_size=5000,
+    password="password",
+    seed=None
+):
+    """Build a synthetic social graph, yielding (relation, rows) per step"""
+    rng = random.Random(seed)
+
+    user_ids = seed_users(users, password, chunk_size)
+    yield "users", len(user_ids)
+
+    user_sampler = PopularitySampler(user_ids, exponent, rng)
+    yield "follows", seed_follows(
+        user_ids, follows_per_user, user_sampler, chunk_size, rng
+    )
+
+    post_ids = seed_posts(user_ids, posts_per_user, chunk_size, rng)
+    yield "posts", len(post_ids)
+
+    yield "comments", seed_comments(
+        post_ids, user_ids, comments_per_post, chunk_size, rng
+    )
+
+    post_sampler = PopularitySampler(post_ids, exponent, rng)
+    yield "likes", seed_likes(
+        user_ids, likes_per_user, post_sampler, chunk_size, rng
+    )
@@ -1,14 +1,72 @@
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 
-from social.models import Comment, Like, Post
+from social.fast_serializers import (
+    DateTimeField,
+    Field,
+    FileField,
+    NestedField,
+    SrcsetField,
+    ValuesSerializer
+)
+from social.models import (
+    ChunkedUpload,
+    Comment,
+    DataExport,
+    Like,
+    Post,
+    ScheduledPost
+)
+from social.pagination import KeysetCursorPagination
+from social_media_api.serializers import (
+    ImageSrcsetField,
+    UpdateFieldsMixin
+)
 
+POST_DETAIL_COMMENTS = 10
+BULK_CREATE_MAX_POSTS = 100
 
-class PostSerializer(serializers.ModelSerializer):
+
+def _first_comments_queryset(post):
+    return (
+        post.comments.select_related("user")
+        .order_by(*KeysetCursorPagination.ordering)
+        [:POST_DETAIL_COMMENTS + 1]
+    )
+
+
+def first_comments_prefetch():
+    """Load the comments PostDetailSerializer embeds for many posts"""
+    return Prefetch(
+        "comments",
+        queryset=Comment.objects.select_related("user")
+        .order_by(*KeysetCursorPagination.ordering)
+        [:POST_DETAIL_COMMENTS + 1],
+        to_attr="_first_comments"
+    )
+
+
+async def aload_first_comments(post):
+    """Fetch the comments PostDetailSerializer embeds, without blocking"""
+    if not hasattr(post, "_first_comments"):
+        post._first_comments = [
+            comment async for comment in _first_comments_queryset(post)
+        ]
+
+
+class PostSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = Post
         fields = [
             "image",
+            "image_srcset",
             "hashtag",
             "title",
             "content",
@@ -32,6 +90,15 @@ class PostListSerializer(PostSerializer):
             "comments_count",
             "likes_count",
         ]
+        read_only_fields = ("comments_count", "likes_count")
+
+
+class PostCommentSerializer(serializers.ModelSerializer):
+    user = serializers.CharField(source="user.username", read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ["id", "user", "content", "created_at"]
 
 
 class PostDetailSerializer(PostSerializer):
@@ -39,22 +106,63 @@ class PostDetailSerializer(PostSerializer):
         source="created_by.username",
         read_only=True
     )
-    comments = serializers.StringRelatedField(many=True)
+    comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
+    tags = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field="name"
+    )
 
     class Meta:
         model = Post
         fields = [
             "id",
             "image",
+            "image_srcset",
             "hashtag",
+            "tags",
             "title",
             "content",
             "created_by",
             "created_at",
             "comments_count",
             "comments",
+            "comments_next",
             "likes_count",
         ]
+        read_only_fields = ("comments_count", "likes_count")
+
+    def _first_comments(self, post):
+        if not hasattr(post, "_first_comments"):
+            post._first_comments = list(_first_comments_queryset(post))
+
+        return post._first_comments
+
+    @extend_schema_field(PostCommentSerializer(many=True))
+    def get_comments(self, post):
+        comments = self._first_comments(post)[:POST_DETAIL_COMMENTS]
+        return PostCommentSerializer(comments, many=True).data
+
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_comments_next(self, post):
+        comments = self._first_comments(post)
+
+        if len(comments) <= POST_DETAIL_COMMENTS:
+            return None
+
+        url = reverse(
+            "social:post-comments",
+            args=[post.pk],
+            request=self.context.get("request")
+        )
+        cursor = KeysetCursorPagination().encode_cursor(
+            comments[POST_DETAIL_COMMENTS - 1]
+        )
+
+        return replace_query_param(
+            url, KeysetCursorPagination.cursor_query_param, cursor
+        )
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -85,3 +193,159 @@ class CommentListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ["id", "user", "post", "content"]
+
+
+class FastPostSerializer(ValuesSerializer):
+    """Read-only twin of PostSerializer over ``.values()`` rows"""
+
+    fields = {
+        "image": FileField("image", Post._meta.get_field("image").storage),
+        "image_srcset": SrcsetField(
+            "image", "image_variants", Post._meta.get_field("image").storage
+        ),
+        "hashtag": Field("hashtag"),
+        "title": Field("title"),
+        "content": Field("content"),
+    }
+
+
+class FastPostListSerializer(ValuesSerializer):
+    """Read-only twin of PostListSerializer over ``.values()`` rows"""
+
+    fields = {
+        "id": Field("id"),
+        "hashtag": Field("hashtag"),
+        "title": Field("title"),
+        "created_by": Field("created_by__username"),
+        "created_at": DateTimeField("created_at"),
+        "comments_count": Field("comments_count"),
+        "likes_count": Field("likes_count"),
+    }
+
+
+class FastLikeListSerializer(ValuesSerializer):
+    """Read-only twin of LikeListSerializer over ``.values()`` rows"""
+
+    fields = {
+        "id": Field("id"),
+        "user": Field("user"),
+        "post": NestedField("post", FastPostSerializer),
+    }
+
+
+class FastCommentListSerializer(ValuesSerializer):
+    """Read-only twin of CommentListSerializer over ``.values()`` rows"""
+
+    fields = {
+        "id": Field("id"),
+        "user": Field("user"),
+        "post": NestedField("post", FastPostSerializer),
+        "content": Field("content"),
+    }
+
+
+class ScheduledPostSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ScheduledPost
+        fields = [
+            "id",
+            "hashtag",
+            "title",
+            "content",
+            "publish_at",
+            "post",
+            "published_at",
+        ]
+        read_only_fields = ("id", "post", "published_at")
+
+    def validate_publish_at(self, publish_at):
+        if publish_at <= timezone.now():
+            raise serializers.ValidationError(
+                "Publish time must be in the future."
+            )
+
+        return publish_at
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            "id",
+            "target",
+            "post",
+            "filename",
+            "size",
+            "checksum",
+            "offset",
+            "status",
+        ]
+        read_only_fields = ("id", "offset", "status")
+
+    def validate_size(self, size):
+        if size < 1:
+            raise serializers.ValidationError("Uploads cannot be empty.")
+
+        if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Uploads are limited to {settings.CHUNKED_UPLOAD_MAX_SIZE} "
+                "bytes."
+            )
+
+        return size
+
+    def validate_checksum(self, checksum):
+        checksum = checksum.lower()
+
+        if len(checksum) != 64 or set(checksum) - set("0123456789abcdef"):
+            raise serializers.ValidationError(
+                "Checksum must be a hex-encoded SHA-256 digest."
+            )
+
+        return checksum
+
+    def validate(self, attrs):
+        post = attrs.get("post")
+        user = self.context["request"].user
+
+        if attrs["target"] == ChunkedUpload.TARGET_POST:
+            if post is None or post.created_by_id != user.pk:
+                raise serializers.ValidationError(
+                    {"post": "Choose one of your own posts."}
+                )
+        elif post is not None:
+            raise serializers.ValidationError(
+                {"post": "Only post uploads can reference a post."}
+            )
+
+        return attrs
+
+
+class DataExportSerializer(serializers.ModelSerializer):
+    download = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DataExport
+        fields = [
+            "id",
+            "status",
+            "section",
+            "rows",
+            "created_at",
+            "completed_at",
+            "download",
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(serializers.URLField(allow_null=True))
+    def get_download(self, export):
+        if export.status != DataExport.STATUS_COMPLETE:
+            return None
+
+        return reverse(
+            "social:dataexport-download",
+            args=[export.pk],
+            request=self.context.get("request")
+        )
@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social.caching import invalidate_posts
+from social.models import Comment, Like, Post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_saved_post(sender, instance, **kwargs):
+    # Deleting clears instance.pk before the transaction commits
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_posts([pk]))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_commented_or_liked_post(sender, instance, **kwargs):
+    # Comments are embedded in the cached post, counters are stored on it
+    post_id = instance.post_id
+    transaction.on_commit(lambda: invalidate_posts([post_id]))
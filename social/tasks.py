@@ -1,21 +1,314 @@
+import logging
+import time
+
+from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
-from social.models import Post
+from social import exports, images, likes, scheduling, timeline, uploads
+from social.caching import invalidate_posts, invalidate_users
+from social.hashtags import sync_post_hashtags
+from social.models import Comment, DataExport, Like, Post
+from user.authentication import invalidate_cached_users
 
-from celery import shared_task
+from celery import chord, shared_task
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def create_post(user_id):
-    user = get_user_model().objects.get(id=user_id)
+
+def _generated_post(user):
     title = "New post"
-    content = f"{title} from {user.username}"
-    hashtag = "Celery"
-    post = Post.objects.create(
-        hashtag=hashtag,
+    return Post(
+        hashtag="Celery",
         title=title,
-        content=content,
+        content=f"{title} from {user.username}",
         created_by=user
     )
+
+
+@shared_task
+def create_post(user_id):
+    user = get_user_model().objects.get(id=user_id)
+    post = _generated_post(user)
     post.save()
+    sync_post_hashtags([post])
+    schedule_fan_out([post.id])
     return post.id
+
+
+@shared_task
+def create_posts(user_ids):
+    """Generate one post for each user with a single bulk INSERT"""
+    started = time.monotonic()
+    users = get_user_model().objects.filter(pk__in=user_ids).only(
+        "id", "username"
+    )
+
+    with transaction.atomic():
+        posts = Post.objects.bulk_create(
+            [_generated_post(user) for user in users]
+        )
+        sync_post_hashtags(posts)
+
+    schedule_fan_out([post.id for post in posts])
+
+    elapsed = time.monotonic() - started
+
+    return {
+        "users": len(user_ids),
+        "created": len(posts),
+        "seconds": elapsed,
+        "posts_per_second": len(posts) / elapsed if elapsed else None,
+    }
+
+
+@shared_task
+def dispatch_create_posts(user_ids=None, chunk_size=500):
+    """Fan post generation out to workers in chunks of user ids.
+
+    Without explicit ids every user gets a post. The per-chunk
+    throughput is reported by report_create_posts once all are done.
+    """
+    if user_ids is None:
+        user_ids = get_user_model().objects.values_list("id", flat=True)
+
+    user_ids = list(user_ids)
+    chunks = [
+        user_ids[start:start + chunk_size]
+        for start in range(0, len(user_ids), chunk_size)
+    ]
+
+    if not chunks:
+        return None
+
+    result = chord(create_posts.s(chunk) for chunk in chunks)(
+        report_create_posts.s(started_at=time.time())
+    )
+
+    return result.id
+
+
+@shared_task
+def report_create_posts(chunk_results, started_at):
+    """Log per-chunk and overall throughput of dispatch_create_posts"""
+    for index, chunk in enumerate(chunk_results):
+        logger.info(
+            "create_posts chunk %s: %s posts in %.3fs (%.1f posts/s)",
+            index,
+            chunk["created"],
+            chunk["seconds"],
+            chunk["posts_per_second"] or 0,
+        )
+
+    created = sum(chunk["created"] for chunk in chunk_results)
+    elapsed = time.time() - started_at
+    summary = {
+        "chunks": len(chunk_results),
+        "created": created,
+        "seconds": elapsed,
+        "posts_per_second": created / elapsed if elapsed else None,
+    }
+    logger.info("create_posts finished: %s", summary)
+
+    return summary
+
+
+@shared_task
+def fan_out_post(post_id):
+    """Push a new post into its author's followers' home timelines"""
+    try:
+        post = Post.objects.select_related("created_by").get(id=post_id)
+    except Post.DoesNotExist:
+        return 0
+
+    return timeline.fan_out(post)
+
+
+@shared_task
+def fan_out_posts(post_ids):
+    """Fan out several new posts from one task"""
+    return sum(
+        timeline.fan_out(post)
+        for post in Post.objects.filter(pk__in=post_ids)
+        .select_related("created_by")
+    )
+
+
+@shared_task
+def publish_scheduled_posts(batch_size=500, max_batches=20):
+    """Publish due scheduled posts in claimed batches"""
+    published = 0
+
+    for _ in range(max_batches):
+        posts = scheduling.publish_due_batch(batch_size)
+        schedule_fan_out([post.id for post in posts])
+
+        published += len(posts)
+
+        if len(posts) < batch_size:
+            break
+
+    return published
+
+
+@shared_task
+def flush_like_buffer():
+    """Write buffered like toggles to the database in bulk"""
+    if not likes.is_buffering_enabled():
+        return 0
+
+    return likes.flush_like_buffer()
+
+
+@shared_task
+def generate_image_variants(model_label, pk):
+    """Create resized/WebP variants of an uploaded image"""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+
+    if instance is None or not instance.image:
+        return {}
+
+    variants = images.generate_variants(instance.image)
+
+    # Skip the write if the image was replaced while we were working
+    if not model.objects.filter(pk=pk, image=instance.image.name).update(
+        image_variants=variants
+    ):
+        images.delete_variants(variants, instance.image.storage)
+        return {}
+
+    # The cached copies still hold the srcset of the previous variants
+    if model is get_user_model():
+        invalidate_cached_users([pk])
+        invalidate_users([pk])
+    elif model is Post:
+        invalidate_posts([pk])
+
+    return variants
+
+
+@shared_task(acks_late=True)
+def export_user_data(export_id):
+    """Write a user's data export, continuing from its last checkpoint"""
+    token = exports.claim_export(export_id)
+
+    if token is None:
+        return None
+
+    export = DataExport.objects.select_related("user").get(pk=export_id)
+
+    try:
+        exports.write_export(export, token, settings.DATA_EXPORT_CHUNK_SIZE)
+    except exports.ExportClaimLost:
+        logger.warning("Export %s was taken over by another worker", export_id)
+        return None
+    except Exception:
+        DataExport.objects.filter(pk=export_id, claim_token=token).update(
+            status=DataExport.STATUS_FAILED, claim_token=None
+        )
+        raise
+
+    return {"rows": export.rows, "bytes": export.offset}
+
+
+@shared_task
+def resume_data_exports():
+    """Re-dispatch exports whose task was lost or whose worker died"""
+    export_ids = [str(pk) for pk in exports.abandoned_export_ids()]
+
+    for export_id in export_ids:
+        export_user_data.delay(export_id)
+
+    return len(export_ids)
+
+
+@shared_task
+def purge_expired_data_exports():
+    """Delete exports kept longer than DATA_EXPORT_RETENTION"""
+    return exports.purge_expired_exports(settings.DATA_EXPORT_RETENTION)
+
+
+@shared_task
+def purge_abandoned_uploads():
+    """Delete chunked uploads never finalized, with their partial files"""
+    return uploads.purge_abandoned_uploads(
+        settings.CHUNKED_UPLOAD_DIR, settings.CHUNKED_UPLOAD_EXPIRY
+    )
+
+
+def schedule_fan_out(post_ids):
+    """Queue the fan-out of new posts once the current transaction commits.
+
+    Without a timeline backend there are no timelines to push to, so no
+    task is queued and no broker is needed.
+    """
+    if post_ids and timeline.get_backend() is not None:
+        transaction.on_commit(lambda: fan_out_posts.delay(post_ids))
+
+
+def schedule_image_variants(instance):
+    """Queue variant generation once the current transaction commits"""
+    if instance.image:
+        label = instance._meta.label
+        transaction.on_commit(
+            lambda: generate_image_variants.delay(label, instance.pk)
+        )
+
+
+def _count_subquery(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0
+    )
+
+
+@shared_task
+def reconcile_post_counters(chunk_size=1000):
+    """Repair drifted comments_count/likes_count values chunk by chunk"""
+    bounds = Post.objects.aggregate(low=Min("pk"), high=Max("pk"))
+
+    if bounds["low"] is None:
+        return 0
+
+    repaired = 0
+
+    for start in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        with transaction.atomic():
+            drifted = list(
+                Post.objects.select_for_update()
+                .filter(pk__gte=start, pk__lt=start + chunk_size)
+                .annotate(
+                    actual_comments=_count_subquery(Comment),
+                    actual_likes=_count_subquery(Like),
+                )
+                .filter(
+                    ~Q(comments_count=F("actual_comments"))
+                    | ~Q(likes_count=F("actual_likes"))
+                )
+                .order_by()
+            )
+
+            for post in drifted:
+                post.comments_count = post.actual_comments
+                post.likes_count = post.actual_likes
+
+            Post.objects.bulk_update(
+                drifted, ["comments_count", "likes_count"]
+            )
+            post_ids = [post.pk for post in drifted]
+            transaction.on_commit(
+                lambda post_ids=post_ids: invalidate_posts(post_ids)
+            )
+            repaired += len(drifted)
+
+    return repaired
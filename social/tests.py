@@ -1,3 +1,1431 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import QuerySet
+from django.test import (
+    AsyncRequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social import caching, likes, scheduling, throttling, timeline
+from social.benchmarks import run_requests
+from social.checks import (
+    check_like_buffer_backend,
+    check_throttle_backend,
+    check_timeline_backend
+)
+from social.hashtags import sync_post_hashtags
+from social.management.commands.benchmark_social import (
+    ENDPOINTS,
+    _exceeded_rates
+)
+from social.images import generate_variants
+from social.models import (
+    ChunkedUpload,
+    Comment,
+    DataExport,
+    Like,
+    Post,
+    ScheduledPost
+)
+from social.seeding import SEED_EMAIL_DOMAIN
+from social.serializers import (
+    CommentListSerializer,
+    FastCommentListSerializer,
+    FastLikeListSerializer,
+    FastPostListSerializer,
+    LikeListSerializer,
+    PostListSerializer,
+    PostSerializer
+)
+from social.tasks import (
+    create_post as create_post_task,
+    create_posts,
+    dispatch_create_posts,
+    fan_out_posts,
+    generate_image_variants,
+    purge_abandoned_uploads,
+    purge_expired_data_exports,
+    reconcile_post_counters
+)
+from social.streaming import NDJSON_MEDIA_TYPE
+from social.views import CommentListViewSet, LikeListView, PostViewSet
+from social_media_api.celery import app
+from user.views import UserViewSet
+
+
+def create_user(index, **extra_fields):
+    return get_user_model().objects.create_user(
+        email=f"user{index}@example.com",
+        password="password123",
+        username=f"user{index}",
+        first_name="Test",
+        last_name=f"User {index}",
+        **extra_fields
+    )
+
+
+def create_post(user, **fields):
+    fields.setdefault("hashtag", "test")
+    fields.setdefault("title", "Test post")
+    fields.setdefault("content", "Test content")
+
+    return Post.objects.create(created_by=user, **fields)
+
+
+class SocialTestCase(TestCase):
+    """Starts every test with empty caches and backends"""
+
+    def setUp(self):
+        cache.clear()
+        caching.get_cache.cache_clear()
+        likes.LIKE_BUFFER.reset()
+        throttling.THROTTLE.reset()
+        timeline.TIMELINE.reset()
+
+        self.user = create_user(1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class LikeTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post = create_post(self.user)
+        self.url = reverse("social:post-like", args=[self.post.pk])
+
+    def test_like_toggles_and_counts(self):
+        for expected in (1, 0, 1):
+            response = self.client.post(self.url)
+            self.post.refresh_from_db()
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.post.likes_count, expected)
+            self.assertEqual(self.post.likes.count(), expected)
+
+
+class PostUpdateTests(SocialTestCase):
+
+    def test_update_keeps_counters_changed_since_the_post_was_loaded(self):
+        post = create_post(self.user)
+        stale = Post.objects.get(pk=post.pk)
+        self.client.post(reverse("social:post-like", args=[post.pk]))
+
+        serializer = PostSerializer(
+            stale, data={"title": "Renamed"}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        post.refresh_from_db()
+
+        self.assertEqual(post.title, "Renamed")
+        self.assertEqual(post.likes_count, 1)
+
+
+class BackendSettingTests(SimpleTestCase):
+
+    def test_backend_is_built_once_per_setting(self):
+        with override_settings(
+            SOCIAL_TIMELINE={
+                "BACKEND": "social.timeline.LocMemTimelineBackend",
+                "MAX_LENGTH": 3,
+            }
+        ):
+            backend = timeline.get_backend()
+
+            self.assertIs(timeline.get_backend(), backend)
+            self.assertIsInstance(backend, timeline.LocMemTimelineBackend)
+            self.assertFalse(backend.shared)
+            self.assertEqual(backend.max_length, 3)
+
+        self.assertIsNot(timeline.get_backend(), backend)
+
+    def test_no_backend(self):
+        with override_settings(SOCIAL_TIMELINE={}):
+            self.assertIsNone(timeline.get_backend())
+
+
+class FeedTests(SocialTestCase):
+    url = reverse("social:post-list")
+
+    def setUp(self):
+        super().setUp()
+        self.author = create_user(2)
+        self.user.follows.add(self.author)
+        create_post(self.author, title="Before")
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+    def _feed_titles(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+        return [post["title"] for post in response.data["results"]]
+
+    def _assert_new_post_appears(self):
+        self.assertEqual(self._feed_titles(), ["Before"])
+
+        author_client = APIClient()
+        author_client.force_authenticate(self.author)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            author_client.post(
+                self.url,
+                {"hashtag": "test", "title": "After", "content": "New"}
+            )
+
+        self.assertEqual(self._feed_titles(), ["After", "Before"])
+
+    def test_new_post_appears_after_the_first_read(self):
+        self._assert_new_post_appears()
+
+    @override_settings(
+        SOCIAL_TIMELINE={"BACKEND": "social.timeline.LocMemTimelineBackend"}
+    )
+    def test_new_post_is_fanned_out_to_a_materialized_timeline(self):
+        self._assert_new_post_appears()
+
+    def _create_posts(self):
+        post = {"hashtag": "test", "title": "New", "content": "Text"}
+
+        with mock.patch.object(fan_out_posts, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                single = self.client.post(self.url, post)
+                bulk = self.client.post(
+                    reverse("social:post-bulk-create"), [post], format="json"
+                )
+                create_post_task(self.user.pk)
+
+        self.assertEqual((single.status_code, bulk.status_code), (201, 201))
+
+        return delay
+
+    def test_no_fan_out_is_queued_without_a_timeline_backend(self):
+        self._create_posts().assert_not_called()
+
+    @override_settings(
+        SOCIAL_TIMELINE={"BACKEND": "social.timeline.LocMemTimelineBackend"}
+    )
+    def test_fan_out_is_queued_with_a_timeline_backend(self):
+        self.assertEqual(self._create_posts().call_count, 3)
+
+
+class RedisTimelineTests(SimpleTestCase):
+
+    @mock.patch("redis.Redis.from_url")
+    def test_push_checks_and_adds_in_one_script_call(self, from_url):
+        client = from_url.return_value
+        backend = timeline.RedisTimelineBackend(
+            location="redis://", max_length=10, timeout=None
+        )
+
+        backend.push([1, 2], 30, 1.5)
+
+        pipe = client.pipeline.return_value
+        self.assertEqual(
+            client.register_script.return_value.call_args_list,
+            [
+                mock.call(
+                    keys=[f"timeline:{user_id}"],
+                    args=["30", "1.5", 10],
+                    client=pipe
+                )
+                for user_id in (1, 2)
+            ]
+        )
+        pipe.exists.assert_not_called()
+        pipe.execute.assert_called_once_with()
+
+
+@override_settings(
+    SOCIAL_TIMELINE={
+        "BACKEND": "social.timeline.LocMemTimelineBackend",
+        "TIMEOUT": 60,
+    }
+)
+class LocMemTimelineTests(SimpleTestCase):
+
+    def test_timeline_expires_after_timeout(self):
+        backend = timeline.get_backend()
+
+        with mock.patch("social.timeline.time.monotonic", return_value=0):
+            backend.replace(1, [(10, 1.0)])
+
+        with mock.patch("social.timeline.time.monotonic", return_value=59):
+            self.assertEqual(backend.fetch(1), [10])
+
+        with mock.patch("social.timeline.time.monotonic", return_value=120):
+            backend.push([1], 11, 2.0)
+
+            self.assertIsNone(backend.fetch(1))
+
+    def test_per_process_backend_is_reported(self):
+        self.assertEqual(
+            [error.id for error in check_timeline_backend(None)],
+            ["social.W001"]
+        )
+
+
+class ThrottleBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        throttling.THROTTLE.reset()
+
+    def _hits(self, backend, count, now):
+        return [
+            backend.hit("user:1", 2, 60, now)[0] for _ in range(count)
+        ]
+
+    def test_cache_backend_limits_the_sliding_window(self):
+        backend = throttling.CacheThrottleBackend(location="default")
+
+        self.assertEqual(self._hits(backend, 3, 60), [True, True, False])
+        # Halfway through the next window, the previous one counts half
+        self.assertEqual(self._hits(backend, 2, 150), [True, False])
+        self.assertEqual(self._hits(backend, 2, 240), [True, True])
+
+    def test_cache_backend_is_shared_with_a_shared_cache(self):
+        self.assertFalse(throttling.get_backend().shared)
+        self.assertEqual(
+            [error.id for error in check_throttle_backend(None)],
+            ["social.W002"]
+        )
+
+        with override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": self.enterContext(tempfile.TemporaryDirectory()),
+        }}):
+            self.assertIsInstance(
+                throttling.get_backend(), throttling.CacheThrottleBackend
+            )
+            self.assertTrue(throttling.get_backend().shared)
+            self.assertEqual(check_throttle_backend(None), [])
+
+    def test_locmem_backend_drops_expired_windows(self):
+        backend = throttling.LocMemThrottleBackend()
+        backend.hit("user:1", 2, 60, 0)
+        backend.hit("user:2", 2, 60, 100)
+        # Both windows of user:1 and user:2 are over by then
+        backend.hit("user:3", 2, 60, 200)
+
+        self.assertEqual(list(backend._windows), ["user:3"])
+
+
+class FeedPaginationTests(SocialTestCase):
+    url = reverse("social:post-list")
+
+    def _create_posts(self, count, created_at=None):
+        posts = Post.objects.bulk_create(
+            Post(created_by=self.user, hashtag="test", title=f"Post {index}")
+            for index in range(count)
+        )
+
+        if created_at is not None:
+            Post.objects.update(created_at=created_at)
+
+        return posts
+
+    def _walk(self, page_size):
+        ids = []
+        response = self.client.get(self.url, {"page_size": page_size})
+
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), page_size)
+            ids.extend(post["id"] for post in response.data["results"])
+
+            if response.data["next"] is None:
+                return ids
+
+            response = self.client.get(response.data["next"])
+
+    def test_pages_follow_created_at_then_id_newest_first(self):
+        older = self._create_posts(3, timezone.now() - timedelta(hours=1))
+        newer = create_post(self.user)
+
+        self.assertEqual(
+            self._walk(page_size=2),
+            [newer.pk, *sorted((post.pk for post in older), reverse=True)]
+        )
+
+    def test_page_size_is_capped(self):
+        self._create_posts(105)
+
+        response = self.client.get(self.url, {"page_size": 500})
+        default = self.client.get(self.url, {"page_size": "many"})
+
+        self.assertEqual(len(response.data["results"]), 100)
+        self.assertEqual(len(default.data["results"]), 20)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_author_created_index_exists(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table
+            )
+
+        self.assertEqual(
+            constraints["post_author_created_idx"]["columns"],
+            ["created_by_id", "created_at", "id"]
+        )
+
+
+class PostCommentsTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post = create_post(self.user)
+        self.detail_url = reverse("social:post-detail", args=[self.post.pk])
+
+    def _comment(self, count):
+        return [
+            Comment.objects.create(
+                post=self.post, user=self.user, content=f"Comment {index}"
+            ).pk
+            for index in range(count)
+        ]
+
+    def test_detail_embeds_every_comment_of_a_short_thread(self):
+        comment_ids = self._comment(3)
+
+        response = self.client.get(self.detail_url)
+
+        self.assertEqual(
+            [comment["id"] for comment in response.data["comments"]],
+            comment_ids[::-1]
+        )
+        self.assertEqual(response.data["comments"][0]["user"], "user1")
+        self.assertIsNone(response.data["comments_next"])
+
+    def test_detail_links_to_the_comments_after_the_first_ten(self):
+        comment_ids = self._comment(12)
+
+        detail = self.client.get(self.detail_url)
+        rest = self.client.get(detail.data["comments_next"])
+
+        self.assertEqual(
+            [comment["id"] for comment in detail.data["comments"]]
+            + [comment["id"] for comment in rest.data["results"]],
+            comment_ids[::-1]
+        )
+        self.assertEqual(len(detail.data["comments"]), 10)
+        self.assertIsNone(rest.data["next"])
+
+    def test_comment_pages_load_users_in_the_same_query(self):
+        url = reverse("social:post-comments", args=[self.post.pk])
+        self._comment(2)
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+
+        self._comment(8)
+
+        with self.assertNumQueries(len(few)):
+            response = self.client.get(url, {"page_size": 5})
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNotNone(response.data["next"])
+
+
+class BulkCreateTests(SocialTestCase):
+    url = reverse("social:post-bulk-create")
+
+    def _post(self, title="Imported", **fields):
+        return {
+            "hashtag": "import",
+            "title": title,
+            "content": "Imported #bulk",
+            **fields
+        }
+
+    def test_creates_every_post_with_one_insert(self):
+        items = [self._post(f"Post {index}") for index in range(3)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, items, format="json")
+        inserts = [
+            query for query in queries
+            if query["sql"].startswith('INSERT INTO "social_post"')
+        ]
+        posts = Post.objects.filter(created_by=self.user).order_by("pk")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            response.data,
+            [
+                {"index": index, "id": post.pk}
+                for index, post in enumerate(posts)
+            ]
+        )
+        self.assertEqual(
+            [post.title for post in posts], ["Post 0", "Post 1", "Post 2"]
+        )
+        self.assertEqual(
+            list(posts[0].tags.values_list("name", flat=True)),
+            ["bulk", "import"]
+        )
+
+    def test_invalid_items_are_reported_without_failing_the_rest(self):
+        response = self.client.post(
+            self.url,
+            [self._post(), self._post(title=""), self._post()],
+            format="json"
+        )
+
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [sorted(result) for result in response.data],
+            [["id", "index"], ["errors", "index"], ["id", "index"]]
+        )
+        self.assertIn("title", response.data[1]["errors"])
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_batch_size_is_limited(self):
+        for items in ([], [self._post()] * 101, self._post()):
+            response = self.client.post(self.url, items, format="json")
+
+            self.assertEqual(response.status_code, 400)
+
+        self.assertFalse(Post.objects.exists())
+
+
+class GeneratedPostTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = [self.user, create_user(2), create_user(3)]
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+    def test_batch_creates_one_post_per_user_with_one_insert(self):
+        user_ids = [user.pk for user in self.users] + [999]
+
+        with CaptureQueriesContext(connection) as queries:
+            result = create_posts(user_ids)
+        inserts = [
+            query for query in queries
+            if query["sql"].startswith('INSERT INTO "social_post"')
+        ]
+
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual((result["users"], result["created"]), (4, 3))
+        self.assertEqual(
+            sorted(Post.objects.values_list("created_by", flat=True)),
+            [user.pk for user in self.users]
+        )
+
+    def test_dispatch_splits_users_into_chunks(self):
+        with self.assertLogs("social.tasks") as logs:
+            dispatch_create_posts(chunk_size=2)
+
+        chunks = [line for line in logs.output if " chunk " in line]
+
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(len(chunks), 2)
+        self.assertIn("2 posts in", chunks[0])
+        self.assertIn("1 posts in", chunks[1])
+        self.assertIn("'created': 3", logs.output[-1])
+
+    def test_dispatch_without_users_sends_nothing(self):
+        self.assertIsNone(dispatch_create_posts(user_ids=[]))
+
+
+class HashtagFilterTests(SocialTestCase):
+    url = reverse("social:post-list")
+
+    def setUp(self):
+        super().setUp()
+        sync_post_hashtags([
+            create_post(self.user, hashtag="testing", title="Tagged"),
+            create_post(self.user, hashtag="other", title="Other"),
+        ])
+
+    def test_prefix_match(self):
+        response = self.client.get(self.url, {"hashtag": "#Test*"})
+
+        self.assertEqual(
+            [post["title"] for post in response.data["results"]], ["Tagged"]
+        )
+
+    def test_prefix_without_letters_is_rejected(self):
+        for hashtag in ("*", "#*", "%*"):
+            response = self.client.get(self.url, {"hashtag": hashtag})
+
+            self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(SocialTestCase):
+    url = reverse("social:post-search")
+
+    def setUp(self):
+        super().setUp()
+        create_post(self.user, title="Django tips", content="Use select")
+        create_post(self.user, title="Celery", content="Django workers")
+        create_post(self.user, title="Cooking", content="Pasta")
+        create_post(create_user(2), title="Hidden", content="Django")
+
+    def _search(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+
+        return response.data
+
+    def test_ranked_search_over_visible_posts(self):
+        titles = [post["title"] for post in self._search("django")["results"]]
+
+        self.assertEqual(titles, ["Django tips", "Celery"])
+
+    def test_database_without_full_text_index(self):
+        with mock.patch.object(connection, "vendor", "mysql"):
+            first = self._search("django", page_size=1)
+            cursor = parse_qs(urlparse(first["next"]).query)["cursor"][0]
+            second = self._search("django", page_size=1, cursor=cursor)
+
+        self.assertEqual(
+            [post["title"] for post in first["results"] + second["results"]],
+            ["Celery", "Django tips"]
+        )
+
+
+class SharedLocMemLikeBuffer(likes.LocMemLikeBuffer):
+    """Stands in for RedisLikeBuffer, tests running in a single process"""
+
+    shared = True
+
+
+@override_settings(
+    SOCIAL_LIKE_BUFFER={
+        "ENABLED": True,
+        "BACKEND": "social.tests.SharedLocMemLikeBuffer",
+    }
+)
+class LikeBufferTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post = create_post(self.user)
+        self.client.post(reverse("social:post-like", args=[self.post.pk]))
+
+    def test_flush_writes_buffered_likes(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+        self.assertEqual(likes.flush_like_buffer(), 1)
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertTrue(self.post.likes.filter(user=self.user).exists())
+
+    def test_failed_flush_keeps_the_toggles(self):
+        with mock.patch(
+            "social.likes.apply_toggles", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                likes.flush_like_buffer()
+
+        self.assertEqual(
+            likes.get_like_buffer().pending_for_user(self.user.pk),
+            {self.post.pk: 1}
+        )
+        self.assertEqual(likes.flush_like_buffer(), 1)
+
+    @override_settings(SOCIAL_LIKE_BUFFER={"ENABLED": True})
+    def test_per_process_buffer_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            likes.is_buffering_enabled()
+
+        self.assertEqual(
+            [error.id for error in check_like_buffer_backend(None)],
+            ["social.E001"]
+        )
+
+
+def image_file(name="image.png", width=800, color="red"):
+    buffer = BytesIO()
+    Image.new("RGB", (width, width // 2), color).save(buffer, format="PNG")
+
+    return SimpleUploadedFile(name, buffer.getvalue(), "image/png")
+
+
+class ImageVariantTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+        self.post = create_post(self.user)
+        self.post.image.save("image.png", image_file(), save=True)
+        generate_image_variants("social.Post", self.post.pk)
+        self.post.refresh_from_db()
+
+    def _variant_names(self, post):
+        return [
+            name
+            for names in post.image_variants.values()
+            for name in names.values()
+        ]
+
+    def test_replaced_image_takes_its_variants_along(self):
+        storage = self.post.image.storage
+        old_names = self._variant_names(self.post)
+        self.assertTrue(old_names)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("social:post-detail", args=[self.post.pk]),
+                {"image": image_file("new.png", color="blue")},
+                format="multipart"
+            )
+        self.post.refresh_from_db()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+        self.assertTrue(all(
+            storage.exists(name) for name in self._variant_names(self.post)
+        ))
+
+    def test_variants_of_an_image_replaced_meanwhile_are_deleted(self):
+        storage = self.post.image.storage
+        generated = []
+
+        def replace_image_while_generating(field_file):
+            variants = generate_variants(field_file)
+            generated.extend(
+                name for names in variants.values() for name in names.values()
+            )
+            Post.objects.filter(pk=self.post.pk).update(image="other.png")
+
+            return variants
+
+        with mock.patch(
+            "social.images.generate_variants",
+            side_effect=replace_image_while_generating
+        ):
+            self.assertEqual(
+                generate_image_variants("social.Post", self.post.pk), {}
+            )
+
+        self.assertTrue(generated)
+        self.assertFalse(any(storage.exists(name) for name in generated))
+
+    def test_new_variants_replace_the_cached_post(self):
+        Post.objects.filter(pk=self.post.pk).update(image_variants={})
+        caching.get_posts([self.post.pk])
+
+        variants = generate_image_variants("social.Post", self.post.pk)
+        cached = caching.get_posts([self.post.pk])[self.post.pk]
+
+        self.assertTrue(variants)
+        self.assertEqual(cached.image_variants, variants)
+
+
+class ReconcileCountersTests(SocialTestCase):
+
+    def test_repaired_posts_are_dropped_from_the_cache(self):
+        post = create_post(self.user)
+        Post.objects.filter(pk=post.pk).update(likes_count=5)
+        caching.get_posts([post.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            repaired = reconcile_post_counters()
+
+        self.assertEqual(repaired, 1)
+        self.assertEqual(caching.get_posts([post.pk])[post.pk].likes_count, 0)
+
+    def test_every_chunk_is_dropped_inside_an_outer_transaction(self):
+        posts = [create_post(self.user), create_post(self.user)]
+        Post.objects.update(likes_count=5)
+        caching.get_posts([post.pk for post in posts])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                reconcile_post_counters(chunk_size=1)
+        cached = caching.get_posts([post.pk for post in posts])
+
+        self.assertEqual(
+            [cached[post.pk].likes_count for post in posts], [0, 0]
+        )
+
+
+class ChunkedUploadTests(SocialTestCase):
+    url = reverse("social:chunkedupload-list")
+
+    def setUp(self):
+        super().setUp()
+        self.upload_dir = tempfile.mkdtemp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.upload_dir)
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(
+            override_settings(
+                CHUNKED_UPLOAD_DIR=self.upload_dir, MEDIA_ROOT=media_root
+            )
+        )
+
+    def _start(self, data, filename="photo.png"):
+        return self.client.post(
+            self.url,
+            {
+                "target": ChunkedUpload.TARGET_USER,
+                "filename": filename,
+                "size": len(data),
+                "checksum": hashlib.sha256(data).hexdigest(),
+            }
+        )
+
+    def _put(self, upload_id, data, content_range):
+        return self.client.generic(
+            "PUT",
+            reverse("social:chunkedupload-detail", args=[upload_id]),
+            data,
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=content_range
+        )
+
+    def _finalize(self, upload_id):
+        return self.client.post(
+            reverse("social:chunkedupload-finalize", args=[upload_id])
+        )
+
+    def _upload(self, data, filename):
+        upload_id = self._start(data, filename).data["id"]
+        self._put(upload_id, data, f"bytes 0-{len(data) - 1}/{len(data)}")
+
+        return upload_id, self._finalize(upload_id)
+
+    def test_image_is_stored_with_the_extension_of_its_format(self):
+        _, response = self._upload(image_file().read(), "photo.html")
+        self.user.refresh_from_db()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self.user.image.name.endswith(".png"))
+
+    def test_non_image_is_rejected(self):
+        upload_id, response = self._upload(
+            b"<html><script>alert(1)</script></html>", "x.html"
+        )
+        self.user.refresh_from_db()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.user.image)
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload_id).offset, 0)
+
+    def test_empty_upload_is_rejected(self):
+        self.assertEqual(self._start(b"").status_code, 400)
+
+    def test_missing_or_short_body_is_rejected(self):
+        upload_id = self._start(b"0123456789").data["id"]
+
+        for body in (b"", b"01234"):
+            response = self._put(upload_id, body, "bytes 0-9/10")
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(
+                ChunkedUpload.objects.get(pk=upload_id).offset, 0
+            )
+
+    def test_finalize_without_partial_file_restarts_the_upload(self):
+        upload_id = self._start(b"0123456789").data["id"]
+        self._put(upload_id, b"0123456789", "bytes 0-9/10")
+        os.remove(ChunkedUpload.objects.get(pk=upload_id).temp_path)
+
+        response = self._finalize(upload_id)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data, {"offset": 0})
+
+    def test_abandoned_uploads_are_purged(self):
+        abandoned_id = self._start(b"0123456789").data["id"]
+        self._put(abandoned_id, b"01234", "bytes 0-4/10")
+        active_id = self._start(b"0123456789").data["id"]
+        self._put(active_id, b"01234", "bytes 0-4/10")
+        stray_path = os.path.join(self.upload_dir, f"{uuid.uuid4()}.part")
+        open(stray_path, "wb").close()
+
+        day_ago = timezone.now() - timedelta(days=1, minutes=1)
+        ChunkedUpload.objects.filter(pk=abandoned_id).update(
+            created_at=day_ago
+        )
+        abandoned_path = ChunkedUpload(id=abandoned_id).temp_path
+        os.utime(stray_path, (day_ago.timestamp(), day_ago.timestamp()))
+
+        self.assertEqual(purge_abandoned_uploads(), 1)
+        self.assertEqual(
+            list(ChunkedUpload.objects.values_list("pk", flat=True)),
+            [uuid.UUID(active_id)]
+        )
+        self.assertFalse(os.path.exists(abandoned_path))
+        self.assertFalse(os.path.exists(stray_path))
+        self.assertTrue(
+            os.path.exists(ChunkedUpload(id=active_id).temp_path)
+        )
+
+
+class ScheduledPostTests(SocialTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.scheduled = ScheduledPost.objects.create(
+            hashtag="test",
+            title="Scheduled",
+            content="Later",
+            created_by=self.user,
+            publish_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_due_posts_are_published_once(self):
+        posts = scheduling.publish_due_batch(10)
+
+        self.assertEqual([post.title for post in posts], ["Scheduled"])
+        self.assertEqual(scheduling.publish_due_batch(10), [])
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.post, posts[0])
+
+    def test_worker_whose_claim_was_taken_over_publishes_nothing(self):
+        stale_token = uuid.uuid4()
+        claimed_at = timezone.now() - scheduling.CLAIM_TIMEOUT * 2
+        ScheduledPost.objects.filter(pk=self.scheduled.pk).update(
+            claim_token=stale_token, claimed_at=claimed_at
+        )
+
+        self.assertEqual(len(scheduling.publish_due_batch(10)), 1)
+
+        with transaction.atomic():
+            late_posts = scheduling._publish(
+                [self.scheduled.pk], timezone.now(), stale_token
+            )
+
+        self.assertEqual(late_posts, [])
+        self.assertEqual(Post.objects.filter(title="Scheduled").count(), 1)
+
+
+class AsyncViewTests(SocialTestCase):
+    """Async handlers answer exactly like the synchronous ones"""
+
+    def setUp(self):
+        super().setUp()
+        author = create_user(2)
+        self.user.follows.add(author)
+        self.post = create_post(author, title="Followed")
+        create_post(self.user, title="Own")
+        Comment.objects.create(post=self.post, user=self.user, content="Hi")
+        Like.objects.create(post=self.post, user=self.user, is_liked=True)
+
+    def _assert_same_responses(self, view_class, path, *args, **kwargs):
+        """Compare ``view_class.as_view(*args)`` with and without async"""
+        contents = []
+
+        for async_views in (False, True):
+            with override_settings(ASYNC_VIEWS=async_views):
+                view = view_class.as_view(*args)
+                request = APIRequestFactory().get(path)
+                force_authenticate(request, self.user)
+
+                if async_views:
+                    response = async_to_sync(view)(request, **kwargs)
+                else:
+                    response = view(request, **kwargs)
+
+            self.assertEqual(response.status_code, 200)
+            contents.append(response.render().content)
+
+        self.assertEqual(contents[0], contents[1])
+
+        return contents[0]
+
+    def test_feed(self):
+        self._assert_same_responses(
+            PostViewSet, "/api/social/posts/", {"get": "list"}
+        )
+
+    def test_filtered_feed(self):
+        sync_post_hashtags([
+            create_post(self.post.created_by, title="Tagged", hashtag="django")
+        ])
+
+        class TitleFilter(BaseFilterBackend):
+            def filter_queryset(self, request, queryset, view):
+                title = request.query_params.get("title")
+                return queryset.filter(title=title) if title else queryset
+
+        class FilteredPostViewSet(PostViewSet):
+            filter_backends = [TitleFilter]
+
+        for query in ("hashtag=django", "hashtag=dj*", "title=Tagged"):
+            with self.subTest(query=query):
+                content = self._assert_same_responses(
+                    FilteredPostViewSet,
+                    f"/api/social/posts/?{query}",
+                    {"get": "list"}
+                )
+
+                self.assertIn(b'"title":"Tagged"', content)
+                self.assertNotIn(b'"title":"Own"', content)
+
+    def test_post_detail(self):
+        self._assert_same_responses(
+            PostViewSet,
+            f"/api/social/posts/{self.post.pk}/",
+            {"get": "retrieve"},
+            pk=str(self.post.pk)
+        )
+
+    def test_user_detail(self):
+        self._assert_same_responses(
+            UserViewSet,
+            f"/api/user/all/{self.user.pk}/",
+            {"get": "retrieve"},
+            pk=str(self.user.pk)
+        )
+
+    def test_liked_posts(self):
+        self._assert_same_responses(LikeListView, "/api/user/liked-posts/")
+
+
+class FastSerializerTests(SocialTestCase):
+    """Values serializers render exactly like their DRF twins"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        with_image = create_post(self.user, title="Image")
+        with_image.image.save("image.png", image_file(), save=True)
+        generate_image_variants("social.Post", with_image.pk)
+        posts = [
+            with_image,
+            create_post(create_user(2), title="No image"),
+            create_post(self.user, title="Blank image", image="")
+        ]
+        Post.objects.filter(pk=posts[1].pk).update(
+            created_at=datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        )
+
+        for post in posts:
+            Like.objects.create(post=post, user=self.user, is_liked=True)
+            Comment.objects.create(post=post, user=self.user, content="Hi")
+
+    def _assert_same_output(self, fast_class, serializer_class, queryset):
+        context = {"request": APIRequestFactory().get("/")}
+        fast = fast_class(context)
+        queryset = queryset.order_by("pk")
+        content = JSONRenderer().render(fast.serialize(fast.values(queryset)))
+
+        self.assertEqual(
+            content,
+            JSONRenderer().render(
+                serializer_class(queryset, many=True, context=context).data
+            )
+        )
+
+        return content
+
+    def test_post_list(self):
+        queryset = Post.objects.select_related("created_by")
+        content = self._assert_same_output(
+            FastPostListSerializer, PostListSerializer, queryset
+        )
+
+        self.assertIn(b'"2024-01-02T03:04:05Z"', content)
+
+        with timezone.override("Europe/Kyiv"):
+            content = self._assert_same_output(
+                FastPostListSerializer, PostListSerializer, queryset
+            )
+
+        self.assertIn(b'"2024-01-02T05:04:05+02:00"', content)
+
+    def test_like_list(self):
+        content = self._assert_same_output(
+            FastLikeListSerializer,
+            LikeListSerializer,
+            Like.objects.select_related("post")
+        )
+
+        self.assertIn(b'"image":"http://testserver/media/', content)
+        self.assertIn(b'"image":null', content)
+
+    def test_comment_list(self):
+        content = self._assert_same_output(
+            FastCommentListSerializer,
+            CommentListSerializer,
+            Comment.objects.select_related("post")
+        )
+
+        self.assertIn(b'"image_srcset":{"', content)
+        self.assertIn(b'"image_srcset":{}', content)
+
+
+class StreamingTests(SocialTestCase):
+    url = reverse("social:comment-list")
+
+    def setUp(self):
+        super().setUp()
+        post = create_post(self.user)
+        self.comments = [
+            Comment.objects.create(post=post, user=self.user, content=text)
+            for text in ("First", "Second", "Third")
+        ]
+        self.expected = self.client.get(self.url).json()
+
+    async def _aread(self, response):
+        return b"".join([chunk async for chunk in response])
+
+    def test_wsgi_request_streams_a_sync_body(self):
+        response = self.client.get(self.url, {"stream": "1"})
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(
+            json.loads(b"".join(response.streaming_content)), self.expected
+        )
+
+    def test_asgi_request_streams_an_async_body(self):
+        request = AsyncRequestFactory().get(self.url, {"stream": "1"})
+        force_authenticate(request, self.user)
+
+        response = CommentListViewSet.as_view({"get": "list"})(request)
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(
+            json.loads(async_to_sync(self._aread)(response)), self.expected
+        )
+
+    def test_ndjson_is_only_offered_for_lists(self):
+        response = self.client.get(self.url, HTTP_ACCEPT=NDJSON_MEDIA_TYPE)
+        lines = b"".join(response.streaming_content).splitlines()
+
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+        response = self.client.get(
+            reverse("social:comment-detail", args=[self.comments[0].pk]),
+            HTTP_ACCEPT=NDJSON_MEDIA_TYPE
+        )
+
+        self.assertEqual(response.status_code, 406)
+
+
+class DataExportTests(SocialTestCase):
+    url = reverse("social:dataexport-list")
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(shutil.rmtree, self.export_dir)
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.media_root, DATA_EXPORT_DIR=self.export_dir
+        ))
+
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", False)
+
+    def _complete_export(self, **fields):
+        export = DataExport.objects.create(
+            user=self.user,
+            status=DataExport.STATUS_COMPLETE,
+            completed_at=timezone.now(),
+            **fields
+        )
+        export.archive.save(export.archive_name, SimpleUploadedFile(
+            "archive", b"archive"
+        ))
+
+        return export
+
+    def test_archive_is_kept_out_of_media_root(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url)
+
+        export = DataExport.objects.get(pk=response.data["id"])
+        download = self.client.get(
+            reverse("social:dataexport-download", args=[export.pk])
+        )
+        lines = gzip.decompress(b"".join(download.streaming_content))
+        download.close()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(export.status, DataExport.STATUS_COMPLETE)
+        self.assertEqual(os.listdir(self.media_root), [])
+        self.assertEqual(os.listdir(self.export_dir), [export.archive_name])
+        self.assertEqual(
+            json.loads(lines.splitlines()[0])["section"], "profile"
+        )
+
+    def test_create_locks_the_user_while_it_looks_for_an_export(self):
+        with mock.patch.object(
+            QuerySet,
+            "select_for_update",
+            autospec=True,
+            side_effect=QuerySet.select_for_update
+        ) as select_for_update:
+            first = self.client.post(self.url)
+            second = self.client.post(self.url)
+
+        self.assertEqual(
+            [call.args[0].model for call in select_for_update.call_args_list],
+            [get_user_model(), get_user_model()]
+        )
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.data["id"], second.data["id"])
+        self.assertEqual(DataExport.objects.count(), 1)
+
+    def test_expired_exports_are_deleted_with_their_files(self):
+        expired = self._complete_export()
+        kept = self._complete_export()
+        failed = DataExport.objects.create(
+            user=self.user,
+            status=DataExport.STATUS_FAILED,
+            claimed_at=timezone.now() - timedelta(days=8)
+        )
+        open(failed.partial_path, "wb").close()
+        DataExport.objects.filter(pk=expired.pk).update(
+            completed_at=timezone.now() - timedelta(days=8)
+        )
+
+        self.assertEqual(purge_expired_data_exports(), 2)
+        self.assertEqual(
+            list(DataExport.objects.values_list("pk", flat=True)), [kept.pk]
+        )
+        self.assertEqual(os.listdir(self.export_dir), [kept.archive_name])
+
+
+@override_settings(
+    SOCIAL_REPLICAS={"REPLICAS": ["replica"], "PIN_SECONDS": 10}
+)
+class ReplicaRoutingTests(SocialTestCase):
+    """Requests through the router with a real replica file next to the
+    test database, seeded once with its schema and never synced again
+    """
+
+    url = reverse("social:post-list")
+    payload = {"title": "Written", "content": "Text", "hashtag": "test"}
+
+    @classmethod
+    def setUpClass(cls):
+        # The alias only exists for this class, so it is added after the
+        # test case wrapped the known databases; nothing is written to it
+        super().setUpClass()
+
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings["replica"] = {
+            **connections["default"].settings_dict,
+            "NAME": os.path.join(cls.replica_dir, "replica.sqlite3"),
+        }
+
+        primary, replica = connections["default"], connections["replica"]
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections["replica"].close()
+        del connections["replica"]
+        del connections.settings["replica"]
+        shutil.rmtree(cls.replica_dir)
+
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.author = create_user(2)
+        self.user.follows.add(self.author)
+        create_post(self.author, title="Not replicated")
+
+    def _list_titles(self, client=None):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = (client or self.client).get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+
+        return (
+            [post["title"] for post in response.data["results"]],
+            len(primary),
+            len(replica),
+        )
+
+    def test_reads_go_to_the_replica(self):
+        titles, primary_queries, replica_queries = self._list_titles()
+
+        self.assertEqual(titles, [])
+        self.assertEqual(primary_queries, 0)
+        self.assertGreater(replica_queries, 0)
+
+    def test_writes_go_to_the_primary(self):
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = self.client.post(self.url, self.payload)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(replica), 0)
+        self.assertTrue(Post.objects.filter(title="Written").exists())
+        self.assertFalse(
+            Post.objects.using("replica").filter(title="Written").exists()
+        )
+
+    def test_writer_reads_the_primary_inside_the_pin_window(self):
+        self.client.post(self.url, self.payload)
+
+        titles, primary_queries, replica_queries = self._list_titles()
+
+        self.assertIn("Written", titles)
+        self.assertGreater(primary_queries, 0)
+        self.assertEqual(replica_queries, 0)
+
+        # Other users are not pinned by someone else's write
+        other = APIClient()
+        other.force_authenticate(self.author)
+        self.assertEqual(self._list_titles(other)[1:], (0, 1))
+
+        # Once the pin expires the writer is back on the replica
+        cache.clear()
+        titles, primary_queries, _ = self._list_titles()
+
+        self.assertEqual(titles, [])
+        self.assertEqual(primary_queries, 0)
+
+
+class BenchmarkTests(SimpleTestCase):
+    responses = {
+        "/ok/": (0.010, 200),
+        "/throttled/": (0.001, 429),
+        "/down/": (0.002, None),
+    }
+
+    def test_latencies_only_count_successful_requests(self):
+        urls = ["/ok/", "/ok/", "/throttled/", "/down/"]
+
+        with mock.patch(
+            "social.benchmarks._timed_request",
+            side_effect=lambda url, token, method: self.responses[url]
+        ):
+            stats = run_requests(
+                lambda index: (urls[index % len(urls)], None, "GET"), 8, 2
+            )
+
+        self.assertEqual((stats["p50_ms"], stats["p99_ms"]), (10.0, 10.0))
+        self.assertEqual((stats["throttled"], stats["errors"]), (2, 2))
+
+    def test_default_run_stays_within_the_throttle_rates(self):
+        # The defaults: 500 requests per concurrency level (3 of them)
+        # spread over 100 users
+        self.assertEqual(list(_exceeded_rates(list(ENDPOINTS), 15)), [])
+        self.assertEqual(
+            list(_exceeded_rates(["feed", "like"], 75)),
+            [("like", 75, "60/min")]
+        )
+
+
+class BenchmarkCommandTests(SocialTestCase):
+    stats = {
+        "requests_per_second": 100.0,
+        "p50_ms": None,
+        "p99_ms": None,
+        "throttled": 5,
+        "errors": 0,
+    }
+
+    def test_concurrency_table_survives_only_throttled_requests(self):
+        out = StringIO()
+
+        with mock.patch(
+            "social.management.commands.benchmark_concurrency.obtain_token",
+            return_value="token"
+        ), mock.patch(
+            "social.management.commands.benchmark_concurrency.run_load",
+            return_value=self.stats
+        ):
+            call_command(
+                "benchmark_concurrency",
+                "--target", "wsgi=http://server",
+                "--email", "user1@example.com",
+                "--password", "password123",
+                "--post-id", "1",
+                "--user-id", "1",
+                "--concurrency", "1",
+                stdout=out
+            )
+
+        header, row = out.getvalue().splitlines()[:2]
+
+        self.assertIn("429s", header)
+        self.assertEqual(row.split()[-4:], ["-", "-", "5", "0"])
+
+    def test_social_signs_tokens_without_logging_in(self):
+        author = get_user_model().objects.create_user(
+            email=f"author@{SEED_EMAIL_DOMAIN}", password="password123"
+        )
+        create_post(author)
+        issued = []
+
+        def run_requests(request_for, requests, concurrency):
+            issued.append(request_for(0)[1])
+            return {"concurrency": concurrency, **self.stats}
+
+        output = os.path.join(self.enterContext(
+            tempfile.TemporaryDirectory()
+        ), "results.json")
+
+        with mock.patch(
+            "social.benchmarks._request",
+            side_effect=AssertionError("No HTTP login expected")
+        ), mock.patch(
+            "social.management.commands.benchmark_social.run_requests",
+            side_effect=run_requests
+        ):
+            call_command(
+                "benchmark_social",
+                "--endpoint", "feed",
+                "--concurrency", "1",
+                "--output", output,
+                stdout=StringIO()
+            )
+
+        self.assertEqual(AccessToken(issued[0])["user_id"], author.pk)
@@ -0,0 +1,214 @@
+from django.core.cache import caches
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle
+)
+
+from social.backends import (
+    BackendSetting,
+    BaseBackend,
+    LocMemBackend,
+    RedisBackend,
+    is_cache_shared
+)
+
+DEFAULTS = {
+    "BACKEND": "social.throttling.CacheThrottleBackend",
+    "LOCATION": "default",
+}
+
+# How often LocMemThrottleBackend drops the windows that ran out, in
+# seconds
+PRUNE_INTERVAL = 60
+
+
+THROTTLE = BackendSetting("SOCIAL_THROTTLE", DEFAULTS)
+throttle_settings = THROTTLE.get
+get_backend = THROTTLE.get_backend
+
+
+class BaseThrottleBackend(BaseBackend):
+    """Sliding-window counters: two integers per key, whatever the rate.
+
+    A request is allowed while ``previous * weight + current`` is below
+    the limit, where ``weight`` is the part of the previous window still
+    inside the sliding window. ``hit`` checks and counts atomically and
+    returns (allowed, previous, current).
+    """
+
+    def hit(self, key, limit, duration, now):
+        raise NotImplementedError
+
+
+class LocMemThrottleBackend(LocMemBackend, BaseThrottleBackend):
+    """In-process backend for tests and single-process development"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._windows = {}
+        self._pruned_at = 0
+
+    def _prune(self, now):
+        """Drop the counters no sliding window covers any more"""
+        if now - self._pruned_at < PRUNE_INTERVAL:
+            return
+
+        self._pruned_at = now
+        self._windows = {
+            key: entry
+            for key, entry in self._windows.items()
+            if entry[0] > now
+        }
+
+    def hit(self, key, limit, duration, now):
+        window = int(now // duration)
+        weight = 1 - (now % duration) / duration
+
+        with self._lock:
+            self._prune(now)
+            _, started, previous, current = self._windows.get(
+                key, (None, window, 0, 0)
+            )
+
+            if started == window - 1:
+                previous, current = current, 0
+            elif started != window:
+                previous, current = 0, 0
+
+            allowed = previous * weight + current < limit
+
+            if allowed:
+                current += 1
+
+            # Once the next window is over, this one counts no more
+            expires_at = (window + 2) * duration
+            self._windows[key] = (expires_at, window, previous, current)
+
+        return allowed, previous, current
+
+
+class CacheThrottleBackend(BaseThrottleBackend):
+    """Backend keeping the counters in the Django cache ``location``.
+
+    Shared by all workers once that cache is (ex. Redis or Memcached,
+    whose ``incr`` is atomic). The request is counted first and taken
+    back if it went over the limit, so concurrent requests may be
+    refused a little early but are never let through over it.
+    """
+
+    @property
+    def shared(self):
+        return is_cache_shared(self.location)
+
+    def hit(self, key, limit, duration, now):
+        window = int(now // duration)
+        weight = 1 - (now % duration) / duration
+        cache = caches[self.location]
+        current_key = f"throttle:{key}:{window}"
+
+        previous = cache.get(f"throttle:{key}:{window - 1}", 0)
+        cache.add(current_key, 0, duration * 2)
+        current = cache.incr(current_key)
+
+        if previous * weight + current - 1 < limit:
+            return True, previous, current
+
+        cache.decr(current_key)
+
+        return False, previous, current - 1
+
+
+class RedisThrottleBackend(RedisBackend, BaseThrottleBackend):
+    """Backend shared by all workers, one script call per check"""
+
+    SCRIPT = """
+    local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+    local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+    local allowed = 0
+
+    if previous * tonumber(ARGV[1]) + current < tonumber(ARGV[2]) then
+        current = redis.call("INCR", KEYS[1])
+        redis.call("EXPIRE", KEYS[1], ARGV[3])
+        allowed = 1
+    end
+
+    return {allowed, previous, current}
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def hit(self, key, limit, duration, now):
+        window = int(now // duration)
+        weight = 1 - (now % duration) / duration
+
+        allowed, previous, current = self._script(
+            keys=[
+                # The hash tag keeps both keys in one Redis Cluster slot
+                f"throttle:{{{key}}}:{window}",
+                f"throttle:{{{key}}}:{window - 1}"
+            ],
+            args=[repr(weight), limit, duration * 2],
+        )
+
+        return bool(allowed), int(previous), int(current)
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle counting in a shared sliding-window backend.
+
+    Instead of a list of request timestamps per client in the cache it
+    keeps two counters, updated with a single atomic backend call.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        allowed, self.previous, self.current = get_backend().hit(
+            self.key, self.num_requests, self.duration, self.now
+        )
+
+        return allowed
+
+    def wait(self):
+        elapsed = self.now % self.duration
+        remaining = self.duration - elapsed
+
+        if self.current >= self.num_requests:
+            # The current window alone is full: wait for it to slide out
+            # far enough as the previous window of the next one.
+            return remaining + self.duration * (
+                1 - self.num_requests / self.current
+            )
+
+        estimate = (
+            self.previous * remaining / self.duration + self.current
+        )
+        return min(
+            (estimate - self.num_requests) * self.duration / self.previous,
+            remaining
+        )
+
+
+class SlidingAnonRateThrottle(AnonRateThrottle, SlidingWindowRateThrottle):
+    pass
+
+
+class SlidingUserRateThrottle(UserRateThrottle, SlidingWindowRateThrottle):
+    pass
+
+
+class SlidingScopedRateThrottle(
+    ScopedRateThrottle, SlidingWindowRateThrottle
+):
+    """Per-view (or per-action) limits set with ``throttle_scope``"""
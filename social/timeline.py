@@ -0,0 +1,285 @@
+import time
+from itertools import islice
+
+from django.db.models import Q
+
+from social.backends import (
+    BackendSetting,
+    BaseBackend,
+    LocMemBackend,
+    RedisBackend
+)
+from social.models import Post
+
+DEFAULTS = {
+    "BACKEND": None,
+    "LOCATION": None,
+    "MAX_LENGTH": 800,
+    "TIMEOUT": 7 * 24 * 60 * 60,
+    "FANOUT_LIMIT": 10000,
+    "FANOUT_CHUNK_SIZE": 1000,
+}
+
+
+TIMELINE = BackendSetting(
+    "SOCIAL_TIMELINE", DEFAULTS, options=("MAX_LENGTH", "TIMEOUT")
+)
+timeline_settings = TIMELINE.get
+get_backend = TIMELINE.get_backend
+
+
+class BaseTimelineBackend(BaseBackend):
+    """Store of materialized home timelines: post ids scored by time.
+
+    A timeline that was never built (or has expired) is reported as
+    ``None`` by ``fetch`` so the caller can rebuild it from the database.
+    ``push`` only touches timelines that already exist.
+    """
+
+    def __init__(self, location=None, max_length=800, timeout=None):
+        super().__init__(location)
+        self.max_length = max_length
+        self.timeout = timeout
+
+    def fetch(self, user_id):
+        raise NotImplementedError
+
+    def replace(self, user_id, entries):
+        raise NotImplementedError
+
+    def push(self, user_ids, post_id, score):
+        raise NotImplementedError
+
+    def clear(self, user_id):
+        raise NotImplementedError
+
+
+class LocMemTimelineBackend(LocMemBackend, BaseTimelineBackend):
+    """In-process backend for tests and single-process development.
+
+    Posts fanned out by a Celery worker never reach the timelines of the
+    web processes, which only see them once their copy expires.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._timelines = {}
+
+    def _entries(self, user_id):
+        """The unexpired entries of a timeline, or None"""
+        timeline = self._timelines.get(user_id)
+
+        if timeline is None:
+            return None
+
+        expires_at, entries = timeline
+
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._timelines[user_id]
+            return None
+
+        return entries
+
+    def fetch(self, user_id):
+        with self._lock:
+            entries = self._entries(user_id)
+
+            if entries is None:
+                return None
+
+            if self.timeout:
+                # Reads keep the timeline alive, like the Redis backend
+                self._timelines[user_id] = (
+                    time.monotonic() + self.timeout, entries
+                )
+
+            return [post_id for _, post_id in entries]
+
+    def replace(self, user_id, entries):
+        entries = sorted(
+            ((score, post_id) for post_id, score in entries), reverse=True
+        )
+        expires_at = time.monotonic() + self.timeout if self.timeout else None
+
+        with self._lock:
+            self._timelines[user_id] = (expires_at, entries[:self.max_length])
+
+    def push(self, user_ids, post_id, score):
+        with self._lock:
+            for user_id in user_ids:
+                entries = self._entries(user_id)
+
+                if entries is None:
+                    continue
+
+                entries.append((score, post_id))
+                entries.sort(reverse=True)
+                del entries[self.max_length:]
+
+    def clear(self, user_id):
+        with self._lock:
+            self._timelines.pop(user_id, None)
+
+
+class RedisTimelineBackend(RedisBackend, BaseTimelineBackend):
+    """Timelines kept as capped Redis sorted sets, one key per user"""
+
+    # Keeps the key alive for users whose timeline is legitimately empty.
+    # It has the lowest possible score, so trimming drops it first.
+    SENTINEL = "-"
+
+    # Only add to a timeline that is still there: checking and adding in
+    # one script keeps a key expiring in between from coming back holding
+    # this single post, and passing for a complete timeline
+    PUSH_SCRIPT = """
+    if redis.call("EXISTS", KEYS[1]) == 1 then
+        redis.call("ZADD", KEYS[1], ARGV[2], ARGV[1])
+        redis.call("ZREMRANGEBYRANK", KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+    end
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._push = self._client.register_script(self.PUSH_SCRIPT)
+
+    @staticmethod
+    def _key(user_id):
+        return f"timeline:{user_id}"
+
+    def fetch(self, user_id):
+        key = self._key(user_id)
+        pipe = self._client.pipeline()
+        pipe.zrevrange(key, 0, -1)
+
+        if self.timeout:
+            pipe.expire(key, self.timeout)
+
+        members = pipe.execute()[0]
+
+        if not members:
+            return None
+
+        return [
+            int(member)
+            for member in members
+            if member != self.SENTINEL.encode()
+        ]
+
+    def replace(self, user_id, entries):
+        key = self._key(user_id)
+        mapping = {str(post_id): score for post_id, score in entries}
+        mapping[self.SENTINEL] = float("-inf")
+
+        pipe = self._client.pipeline()
+        pipe.delete(key)
+        pipe.zadd(key, mapping)
+        pipe.zremrangebyrank(key, 0, -(self.max_length + 1))
+
+        if self.timeout:
+            pipe.expire(key, self.timeout)
+
+        pipe.execute()
+
+    def push(self, user_ids, post_id, score):
+        # One script call per key, so followers may live on any cluster node
+        pipe = self._client.pipeline(transaction=False)
+
+        for user_id in user_ids:
+            self._push(
+                keys=[self._key(user_id)],
+                args=[str(post_id), repr(score), self.max_length],
+                client=pipe
+            )
+
+        pipe.execute()
+
+    def clear(self, user_id):
+        self._client.delete(self._key(user_id))
+
+
+def _score(post):
+    return post.created_at.timestamp()
+
+
+def _query_timeline(user):
+    return Post.objects.filter(
+        Q(created_by=user) | Q(created_by__in=user.follows.all())
+    )
+
+
+def build_timeline(user):
+    """Materialize a user's timeline from the database"""
+    options = timeline_settings()
+    entries = [
+        (post_id, created_at.timestamp())
+        for post_id, created_at in _query_timeline(user).values_list(
+            "id", "created_at"
+        )[:options["MAX_LENGTH"]]
+    ]
+    get_backend().replace(user.pk, entries)
+
+    return [post_id for post_id, _ in entries]
+
+
+def get_timeline_post_ids(user):
+    """Return ids of posts in a user's home timeline.
+
+    Posts of accounts with more than FANOUT_LIMIT followers are never
+    pushed, so they are pulled from the database at read time instead.
+    Without a backend the whole timeline is read from the database, as
+    a subquery.
+    """
+    options = timeline_settings()
+    backend = get_backend()
+
+    if backend is None:
+        return _query_timeline(user).values("id")
+
+    post_ids = backend.fetch(user.pk)
+
+    if post_ids is None:
+        post_ids = build_timeline(user)
+
+    pulled_ids = Post.objects.filter(
+        created_by__in=user.follows.filter(
+            followers_count__gt=options["FANOUT_LIMIT"]
+        )
+    ).values_list("id", flat=True)[:options["MAX_LENGTH"]]
+
+    return set(post_ids).union(pulled_ids)
+
+
+def fan_out(post):
+    """Push a new post into the timelines of its author and followers"""
+    options = timeline_settings()
+    backend = get_backend()
+    author = post.created_by
+
+    if backend is None:
+        return 0
+
+    backend.push([author.pk], post.pk, _score(post))
+
+    if author.followers_count > options["FANOUT_LIMIT"]:
+        return 0
+
+    follower_ids = author.followers.values_list("pk", flat=True).iterator(
+        chunk_size=options["FANOUT_CHUNK_SIZE"]
+    )
+    pushed = 0
+
+    while True:
+        chunk = list(islice(follower_ids, options["FANOUT_CHUNK_SIZE"]))
+
+        if not chunk:
+            return pushed
+
+        backend.push(chunk, post.pk, _score(post))
+        pushed += len(chunk)
+
+
+def invalidate_timeline(user):
+    backend = get_backend()
+
+    if backend is not None:
+        backend.clear(user.pk)
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image
+
+from social.images import FORMAT_EXTENSIONS, discard_variants
+from social.models import ChunkedUpload
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+COPY_BUFFER_SIZE = 64 * 1024
+
+# Image formats accepted, with the extension files are stored under
+IMAGE_EXTENSIONS = {**FORMAT_EXTENSIONS, "GIF": "gif"}
+
+
+def parse_content_range(header):
+    """Parse "bytes start-end/total" into (start, length, total)"""
+    match = CONTENT_RANGE_RE.match(header or "")
+
+    if not match:
+        return None
+
+    start, end, total = (int(value) for value in match.groups())
+
+    if end < start:
+        return None
+
+    return start, end - start + 1, total
+
+
+def append_chunk(upload, stream, length):
+    """Append ``length`` bytes of ``stream`` to the upload's partial file.
+
+    The body is copied in small buffers, so a chunk is never held in
+    memory. Anything past the recorded offset (left by an interrupted
+    request) is truncated first. Returns the number of bytes written.
+    """
+    os.makedirs(os.path.dirname(upload.temp_path), exist_ok=True)
+    written = 0
+
+    with open(upload.temp_path, "ab") as partial:
+        partial.truncate(upload.offset)
+
+        while written < length:
+            data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+
+            if not data:
+                break
+
+            partial.write(data)
+            written += len(data)
+
+    return written
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as assembled:
+        for block in iter(lambda: assembled.read(COPY_BUFFER_SIZE), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def detect_image_format(path):
+    """The format of an accepted image, or None for anything else"""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+            image_format = image.format
+    except (
+        OSError, SyntaxError, ValueError, Image.DecompressionBombError
+    ):
+        return None
+
+    return image_format if image_format in IMAGE_EXTENSIONS else None
+
+
+def attach_upload(upload, image_format):
+    """Save the assembled file as the image of the upload's target.
+
+    The stored name ends with the extension of the detected format, never
+    with the one the client sent.
+    """
+    if upload.target == ChunkedUpload.TARGET_POST:
+        instance = upload.post
+    else:
+        instance = upload.user
+
+    discard_variants(instance)
+    root, _ = os.path.splitext(upload.filename)
+    filename = f"{root}.{IMAGE_EXTENSIONS[image_format]}"
+
+    with open(upload.temp_path, "rb") as assembled:
+        instance.image.save(filename, File(assembled), save=False)
+
+    instance.image_variants = {}
+    instance.save(update_fields=["image", "image_variants"])
+
+    return instance
+
+
+def discard_partial_file(upload):
+    _remove(upload.temp_path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def purge_abandoned_uploads(directory, expiry):
+    """Delete pending uploads started more than ``expiry`` ago.
+
+    Partial files left without a pending upload (ex. by a crash between
+    finalizing and deleting the file) go as well, once as old. Returns
+    the number of uploads deleted.
+    """
+    cutoff = timezone.now() - expiry
+    pending = ChunkedUpload.objects.filter(
+        status=ChunkedUpload.STATUS_PENDING
+    )
+    expired = list(pending.filter(created_at__lt=cutoff))
+    ChunkedUpload.objects.filter(
+        pk__in=[upload.pk for upload in expired]
+    ).delete()
+
+    for upload in expired:
+        discard_partial_file(upload)
+
+    if not os.path.isdir(directory):
+        return len(expired)
+
+    pending_names = {
+        f"{pk}.part" for pk in pending.values_list("pk", flat=True)
+    }
+
+    for entry in os.scandir(directory):
+        if (
+            entry.name.endswith(".part")
+            and entry.name not in pending_names
+            and entry.stat().st_mtime < cutoff.timestamp()
+        ):
+            _remove(entry.path)
+
+    return len(expired)
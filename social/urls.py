@@ -1,11 +1,24 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from social.views import CommentListViewSet, PostViewSet
+from social.views import (
+    CacheStatsView,
+    ChunkedUploadViewSet,
+    CommentListViewSet,
+    DataExportViewSet,
+    PostViewSet,
+    ScheduledPostViewSet
+)
 
 router = DefaultRouter()
 router.register("posts", PostViewSet)
 router.register("commented-posts", CommentListViewSet)
+router.register("uploads", ChunkedUploadViewSet)
+router.register("scheduled-posts", ScheduledPostViewSet)
+router.register("exports", DataExportViewSet)
 
-urlpatterns = [] + router.urls
+urlpatterns = [
+    path("cache-stats/", CacheStatsView.as_view(), name="cache-stats"),
+] + router.urls
 
 app_name = "social"
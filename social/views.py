@@ -1,33 +1,93 @@
-from django.db.models import Q
-from django.http import Http404
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, status, generics, mixins
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
-from social.models import Comment, Like, Post
+from social import likes, timeline
+from social.async_views import AsyncViewMixin
+from social.caching import get_cache, get_posts
+from social.db_router import ReplicaReadMixin
+from social.hashtags import (
+    HASHTAG_FIELD_RE,
+    normalize_hashtag,
+    sync_post_hashtags
+)
+from social.images import discard_variants
+from social.models import (
+    ChunkedUpload,
+    Comment,
+    DataExport,
+    Like,
+    Post,
+    ScheduledPost
+)
+from social.pagination import (
+    KeysetCursorPagination,
+    RankedCursorPagination
+)
+from social.search import PostSearch
+from social.streaming import STREAM_PARAMETER, StreamingListMixin
 from social.serializers import (
+    BULK_CREATE_MAX_POSTS,
+    ChunkedUploadSerializer,
     CommentSerializer,
     CommentListSerializer,
+    DataExportSerializer,
+    FastCommentListSerializer,
+    FastLikeListSerializer,
+    FastPostListSerializer,
     LikeSerializer,
     LikeListSerializer,
+    PostCommentSerializer,
     PostSerializer,
     PostListSerializer,
     PostDetailSerializer,
+    ScheduledPostSerializer,
+    aload_first_comments,
 )
+from social.tasks import (
+    export_user_data,
+    schedule_fan_out,
+    schedule_image_variants
+)
+from social.uploads import (
+    append_chunk,
+    attach_upload,
+    detect_image_format,
+    discard_partial_file,
+    file_checksum,
+    parse_content_range
+)
+from user.authentication import get_followed_ids
 from user.permissions import (
     IsAdminOrIsAuthenticatedReadOnly,
     IsCreatedOrReadOnly
 )
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    ReplicaReadMixin, AsyncViewMixin, viewsets.ModelViewSet
+):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = (IsAdminOrIsAuthenticatedReadOnly,)
+    pagination_class = KeysetCursorPagination
+    # Set per action, see SlidingScopedRateThrottle
+    throttle_scope = None
 
     def get_permissions(self):
         if self.action == "create":
@@ -39,7 +99,7 @@ class PostViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ("list", "search"):
             return PostListSerializer
 
         if self.action == "retrieve":
@@ -51,74 +111,261 @@ class PostViewSet(viewsets.ModelViewSet):
         if self.action == "add_comment":
             return CommentSerializer
 
+        if self.action == "comments":
+            return PostCommentSerializer
+
         return PostSerializer
 
     def get_queryset(self):
-        queryset = self.queryset.prefetch_related("comments", "likes")
+        queryset = self.queryset
+
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("tags")
 
         hashtag = self.request.query_params.get("hashtag")
         username = self.request.query_params.get("username")
 
-        if hashtag:
-            queryset = queryset.filter(hashtag__icontains=hashtag)
+        if hashtag and hashtag.endswith("*"):
+            prefix = normalize_hashtag(hashtag[:-1])
+
+            if not HASHTAG_FIELD_RE.fullmatch(prefix):
+                raise ValidationError(
+                    {"hashtag": "A prefix needs letters or digits before *."}
+                )
+
+            queryset = queryset.filter(
+                tags__name__startswith=prefix
+            ).distinct()
+        elif hashtag:
+            queryset = queryset.filter(tags__name=normalize_hashtag(hashtag))
         if username:
             queryset = queryset.filter(created_by=username)
 
-        queryset = queryset.filter(
-            Q(created_by=self.request.user)
-            | Q(created_by__in=self.request.user.follows.all())
-        )
+        if self.action == "list" and not (hashtag or username):
+            queryset = queryset.filter(
+                pk__in=timeline.get_timeline_post_ids(self.request.user)
+            )
+        else:
+            queryset = queryset.filter(
+                Q(created_by=self.request.user)
+                | Q(created_by__in=get_followed_ids(self.request.user))
+            )
         queryset = queryset.select_related("created_by")
 
         return queryset
 
+    def get_object(self):
+        """Serve post detail from the object cache when unfiltered"""
+        params = self.request.query_params
+
+        if (
+            self.action != "retrieve"
+            or params.get("hashtag")
+            or params.get("username")
+        ):
+            return super().get_object()
+
+        try:
+            pk = int(self.kwargs["pk"])
+        except ValueError:
+            raise Http404
+
+        post = get_posts([pk]).get(pk)
+        user = self.request.user
+
+        if post is None or (
+            post.created_by_id != user.pk
+            and post.created_by_id not in get_followed_ids(user)
+        ):
+            raise Http404
+
+        self.check_object_permissions(self.request, post)
+
+        return post
+
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(created_by=self.request.user)
+            sync_post_hashtags([post])
+
+        schedule_fan_out([post.id])
+        schedule_image_variants(post)
+
+    def perform_update(self, serializer):
+        image_changed = "image" in serializer.validated_data
+
+        with transaction.atomic():
+            if image_changed:
+                discard_variants(serializer.instance)
+                post = serializer.save(image_variants={})
+            else:
+                post = serializer.save()
+            sync_post_hashtags([post])
+
+        if image_changed:
+            schedule_image_variants(post)
 
     @action(
         methods=["POST"],
         detail=True,
         url_path="like",
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        throttle_scope="like"
     )
     def like(self, request, pk=None):
         """Endpoint for users to like posts"""
         post = self.get_object()
         user = self.request.user
 
-        try:
-            like = get_object_or_404(Like, post=post, user=user)
-            like.delete()
-        except Http404:
-            Like.objects.create(post=post, user=user, is_liked=True)
+        if likes.is_buffering_enabled():
+            likes.toggle_like(user, post)
+            return Response(status=status.HTTP_200_OK)
+
+        with transaction.atomic():
+            # Only the request that actually removed the row decrements,
+            # so concurrent unlikes cannot push the counter below the
+            # number of likes
+            deleted, _ = Like.objects.filter(post=post, user=user).delete()
+
+            if deleted:
+                delta = -1
+            else:
+                Like.objects.create(post=post, user=user, is_liked=True)
+                delta = 1
+
+            Post.objects.filter(pk=post.pk).update(
+                likes_count=F("likes_count") + delta
+            )
 
         return Response(status=status.HTTP_200_OK)
 
+    @extend_schema(request=PostSerializer(many=True))
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk",
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_create(self, request):
+        """Endpoint for creating many posts with a single INSERT"""
+        items = request.data
+
+        if (
+            not isinstance(items, list)
+            or not 0 < len(items) <= BULK_CREATE_MAX_POSTS
+        ):
+            return Response(
+                {"detail": f"Send a list of 1 to {BULK_CREATE_MAX_POSTS} "
+                           "posts."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = []
+        posts = []
+
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+
+            if serializer.is_valid():
+                posts.append(
+                    Post(created_by=request.user, **serializer.validated_data)
+                )
+                results.append({"index": index})
+            else:
+                results.append({"index": index, "errors": serializer.errors})
+
+        with transaction.atomic():
+            created = Post.objects.bulk_create(posts)
+            sync_post_hashtags(created)
+
+        schedule_fan_out([post.id for post in created])
+
+        created_ids = iter(post.id for post in created)
+        for result in results:
+            if "errors" not in result:
+                result["id"] = next(created_ids)
+
+        failed = len(posts) < len(items)
+
+        return Response(
+            results,
+            status=status.HTTP_207_MULTI_STATUS
+            if failed else status.HTTP_201_CREATED
+        )
+
     @action(
         methods=["POST"],
         detail=True,
         url_path="add_comment",
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        throttle_scope="add_comment"
     )
     def add_comment(self, request, pk=None):
         """Endpoint for users to comment posts"""
         post = self.get_object()
         user = self.request.user
 
-        Comment.objects.create(
-            post=post,
-            user=user,
-            content=request.data["content"]
-        )
+        with transaction.atomic():
+            Comment.objects.create(
+                post=post,
+                user=user,
+                content=request.data["content"]
+            )
+            Post.objects.filter(pk=post.pk).update(
+                comments_count=F("comments_count") + 1
+            )
 
         return Response(status=status.HTTP_200_OK)
 
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="comments",
+        permission_classes=(IsAuthenticated,)
+    )
+    def comments(self, request, pk=None):
+        """Endpoint for paging through comments of a post"""
+        post = self.get_object()
+        queryset = Comment.objects.filter(post=post).select_related("user")
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Full-text search in titles and content "
+                            "of visible posts (ex. ?q=django celery)"
+            )
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="search",
+        pagination_class=RankedCursorPagination,
+        permission_classes=(IsAuthenticated,)
+    )
+    def search(self, request):
+        """Endpoint for ranked full-text search over visible posts"""
+        search = PostSearch(request.user, request.query_params.get("q"))
+        page = self.paginate_queryset(search)
+        serializer = self.get_serializer(page, many=True)
+
+        return self.get_paginated_response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
                 name="hashtag",
                 type=str,
-                description="Filter by hashtag (ex. ?hashtag=YourHashtag)"
+                description=(
+                    "Filter by hashtag (ex. ?hashtag=YourHashtag), "
+                    "append * for a prefix match (ex. ?hashtag=Your*)"
+                )
             ),
             OpenApiParameter(
                 name="username",
@@ -128,10 +375,37 @@ class PostViewSet(viewsets.ModelViewSet):
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        serializer = FastPostListSerializer(self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(serializer.values(queryset))
+
+        return self.get_paginated_response(serializer.serialize(page))
+
+    async def alist(self, request, *args, **kwargs):
+        serializer = FastPostListSerializer(self.get_serializer_context())
+        queryset = self.filter_queryset(
+            await sync_to_async(self.get_queryset)()
+        )
+        page = await self.paginator.apaginate_queryset(
+            serializer.values(queryset), request, view=self
+        )
 
+        return self.get_paginated_response(serializer.serialize(page))
 
-class LikeListView(generics.ListAPIView):
+    async def aretrieve(self, request, *args, **kwargs):
+        post = await sync_to_async(self.get_object)()
+        await aload_first_comments(post)
+        serializer = self.get_serializer(post)
+
+        return Response(serializer.data)
+
+
+class LikeListView(
+    ReplicaReadMixin,
+    AsyncViewMixin,
+    StreamingListMixin,
+    generics.ListAPIView
+):
     queryset = Like.objects.all()
     serializer_class = LikeListSerializer
 
@@ -143,8 +417,52 @@ class LikeListView(generics.ListAPIView):
 
         return queryset
 
+    @extend_schema(parameters=[STREAM_PARAMETER])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        new_likes = []
+
+        if likes.is_buffering_enabled():
+            queryset, new_likes = likes.overlay_user_likes(
+                request.user, queryset
+            )
+
+        serializer = FastLikeListSerializer(self.get_serializer_context())
+        new_likes = self.get_serializer(new_likes, many=True).data
+
+        if self.wants_stream():
+            return self.stream_list(serializer, queryset, new_likes)
+
+        rows = serializer.values(queryset)
+
+        return Response(serializer.serialize(rows) + new_likes)
+
+    async def aget(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        new_likes = []
+
+        if likes.is_buffering_enabled():
+            queryset, new_likes = await sync_to_async(
+                likes.overlay_user_likes
+            )(request.user, queryset)
+
+        serializer = FastLikeListSerializer(self.get_serializer_context())
+        new_likes = self.get_serializer(new_likes, many=True).data
+
+        if self.wants_stream():
+            return self.stream_list(serializer, queryset, new_likes)
+
+        rows = [row async for row in serializer.values(queryset)]
+
+        return Response(serializer.serialize(rows) + new_likes)
+
 
 class CommentListViewSet(
+    ReplicaReadMixin,
+    StreamingListMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
     mixins.UpdateModelMixin,
@@ -170,3 +488,264 @@ class CommentListViewSet(
             return CommentSerializer
 
         return CommentSerializer
+
+    @extend_schema(parameters=[STREAM_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        serializer = FastCommentListSerializer(self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.wants_stream():
+            return self.stream_list(serializer, queryset)
+
+        rows = serializer.values(queryset)
+
+        return Response(serializer.serialize(rows))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            Post.objects.filter(pk=instance.post_id).update(
+                comments_count=F("comments_count") - 1
+            )
+
+
+class CacheStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        """Endpoint for hit/miss counters of this process's object cache"""
+        return Response(get_cache().stats())
+
+
+class ScheduledPostViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet
+):
+    queryset = ScheduledPost.objects.all()
+    serializer_class = ScheduledPostSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(created_by=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+
+class ChunkedUploadViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet
+):
+    """Resumable image uploads: create, PUT chunks, then finalize"""
+
+    queryset = ChunkedUpload.objects.all()
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(
+            user=self.request.user,
+            status=ChunkedUpload.STATUS_PENDING
+        )
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @extend_schema(
+        request=None,
+        parameters=[
+            OpenApiParameter(
+                name="Content-Range",
+                type=str,
+                location=OpenApiParameter.HEADER,
+                required=True,
+                description="Byte range of the chunk "
+                            "(ex. bytes 0-1048575/5242880)"
+            )
+        ]
+    )
+    def update(self, request, pk=None):
+        """Endpoint for appending a chunk at the current offset"""
+        content_range = parse_content_range(
+            request.headers.get("Content-Range")
+        )
+
+        if content_range is None:
+            return Response(
+                {"detail": "A valid Content-Range header is required."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start, length, total = content_range
+
+        if request.stream is None:
+            return Response(
+                {"detail": "The chunk is missing from the request body."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            upload = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=pk
+            )
+
+            if start != upload.offset:
+                return Response(
+                    {"offset": upload.offset},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            if (
+                total != upload.size
+                or start + length > upload.size
+                or length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE
+            ):
+                return Response(
+                    {"detail": "Chunk does not fit the upload."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            written = append_chunk(upload, request.stream, length)
+
+            if written < length:
+                # Whatever arrived is truncated by the next attempt
+                return Response(
+                    {
+                        "detail": "The request body is shorter than "
+                                  "Content-Range.",
+                        "offset": upload.offset
+                    },
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            upload.offset += written
+            upload.save(update_fields=["offset"])
+
+        serializer = self.get_serializer(upload)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def _restart(self, upload, detail):
+        upload.offset = 0
+        upload.save(update_fields=["offset"])
+        discard_partial_file(upload)
+
+        return Response(
+            {"detail": detail}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @extend_schema(request=None)
+    @action(methods=["POST"], detail=True, url_path="finalize")
+    def finalize(self, request, pk=None):
+        """Endpoint for verifying and attaching a fully uploaded file"""
+        with transaction.atomic():
+            upload = get_object_or_404(
+                self.get_queryset().select_for_update(), pk=pk
+            )
+
+            if upload.offset != upload.size:
+                return Response(
+                    {"offset": upload.offset},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            if not os.path.exists(upload.temp_path):
+                upload.offset = 0
+                upload.save(update_fields=["offset"])
+
+                return Response(
+                    {"offset": upload.offset},
+                    status=status.HTTP_409_CONFLICT
+                )
+
+            if file_checksum(upload.temp_path) != upload.checksum:
+                return self._restart(
+                    upload, "Checksum mismatch, upload restarted."
+                )
+
+            image_format = detect_image_format(upload.temp_path)
+
+            if image_format is None:
+                return self._restart(
+                    upload, "The file is not a supported image."
+                )
+
+            instance = attach_upload(upload, image_format)
+            upload.status = ChunkedUpload.STATUS_COMPLETE
+            upload.save(update_fields=["status"])
+
+        discard_partial_file(upload)
+        schedule_image_variants(instance)
+        serializer = self.get_serializer(upload)
+
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class DataExportViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    GenericViewSet
+):
+    """Archives of the user's posts, comments, likes and follows"""
+
+    queryset = DataExport.objects.all()
+    serializer_class = DataExportSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    @extend_schema(request=None)
+    def create(self, request):
+        """Endpoint for starting an export, or resuming an unfinished one"""
+        with transaction.atomic():
+            # Concurrent requests of a user wait here for each other, so
+            # only the first one creates an export
+            get_user_model().objects.select_for_update().get(
+                pk=request.user.pk
+            )
+            export = self.get_queryset().exclude(
+                status=DataExport.STATUS_COMPLETE
+            ).first()
+            created = export is None
+
+            if created:
+                export = DataExport.objects.create(user=request.user)
+            elif export.status == DataExport.STATUS_FAILED:
+                export.status = DataExport.STATUS_PENDING
+                export.save(update_fields=["status"])
+
+        export_id = str(export.pk)
+        transaction.on_commit(lambda: export_user_data.delay(export_id))
+        serializer = self.get_serializer(export)
+
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @extend_schema(
+        responses={(200, "application/gzip"): OpenApiTypes.BINARY}
+    )
+    @action(methods=["GET"], detail=True, url_path="download")
+    def download(self, request, pk=None):
+        """Endpoint for downloading a finished export as gzip NDJSON"""
+        export = self.get_object()
+
+        if export.status != DataExport.STATUS_COMPLETE:
+            return Response(
+                {"status": export.status},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return FileResponse(
+            export.archive.open("rb"),
+            as_attachment=True,
+            filename=f"export-{export.pk}.ndjson.gz",
+            content_type="application/gzip"
+        )
@@ -0,0 +1,56 @@
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+from rest_framework.utils import model_meta
+
+from social.images import build_srcset
+
+
+class UpdateFieldsMixin:
+    """ModelSerializer saving only the fields it was given on update.
+
+    A plain ``save()`` writes every column of the instance, so values
+    other requests changed since it was loaded (ex. counters kept with
+    ``F()`` updates) would be written back stale.
+    """
+
+    def update(self, instance, validated_data):
+        info = model_meta.get_field_info(instance)
+        update_fields = []
+        many_to_many = {}
+
+        for attr, value in validated_data.items():
+            if attr in info.relations and info.relations[attr].to_many:
+                many_to_many[attr] = value
+            else:
+                setattr(instance, attr, value)
+                update_fields.append(attr)
+
+        if update_fields:
+            instance.save(update_fields=update_fields)
+
+        for attr, value in many_to_many.items():
+            getattr(instance, attr).set(value)
+
+        return instance
+
+
+@extend_schema_field(
+    {"type": "object", "additionalProperties": {"type": "string"}}
+)
+class ImageSrcsetField(serializers.Field):
+    """Read-only {format: srcset} map of an instance's image variants"""
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        if not instance.image:
+            return {}
+
+        return build_srcset(
+            instance.image_variants,
+            instance.image.storage,
+            self.context.get("request")
+        )
@@ -61,6 +61,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "social.db_router.ReplicaPinningMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",  
 ]
@@ -96,6 +97,34 @@ DATABASES = {
     }
 }
 
+# Read replicas of the database above, as comma-separated SQLite files
+# (ex. DATABASE_REPLICAS=db_replica.sqlite3). Locally they are refreshed
+# with "python manage.py sync_replicas".
+for index, name in enumerate(
+    filter(None, os.environ.get("DATABASE_REPLICAS", "").split(","))
+):
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / name,
+        "TEST": {"MIRROR": "default"},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+DATABASE_ROUTERS = ["social.db_router.ReplicaRouter"]
+
+SOCIAL_REPLICAS = {
+    "REPLICAS": [alias for alias in DATABASES if alias != "default"],
+    "PIN_SECONDS": 10,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -137,6 +166,21 @@ STATIC_URL = "static/"
 MEDIA_ROOT = BASE_DIR / "media"
 MEDIA_URL = "/media/"
 
+# Partial files of resumable uploads, kept outside of MEDIA_ROOT
+CHUNKED_UPLOAD_DIR = BASE_DIR / "chunked_uploads"
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+# Uploads not finalized this long after they started are deleted
+CHUNKED_UPLOAD_EXPIRY = timedelta(days=1)
+
+# User data exports, kept outside of MEDIA_ROOT and only served by the
+# download action, and rows per checkpoint
+DATA_EXPORT_DIR = BASE_DIR / "data_exports"
+DATA_EXPORT_CHUNK_SIZE = 1000
+# Finished (or failed) exports are deleted this long after their last
+# progress
+DATA_EXPORT_RETENTION = timedelta(days=7)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -145,19 +189,31 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle"
+        "social.throttling.SlidingAnonRateThrottle",
+        "social.throttling.SlidingUserRateThrottle",
+        "social.throttling.SlidingScopedRateThrottle"
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": "100/day",
-        "user": "1000/day"
+        "user": "1000/day",
+        "like": "60/min",
+        "add_comment": "20/min"
     }
 }
 
+# Counters live in the "default" cache, shared by every worker once
+# CACHE_BACKEND is Redis or Memcached
+SOCIAL_THROTTLE = {
+    "BACKEND": os.environ.get(
+        "THROTTLE_BACKEND", "social.throttling.CacheThrottleBackend"
+    ),
+    "LOCATION": os.environ.get("THROTTLE_LOCATION", "default"),
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Social Media API",
     "DESCRIPTION": "Simple Social media API",
@@ -174,6 +230,15 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.BloomTokenRefreshSerializer",
+}
+
+JTI_BLACKLIST_FILTER = {
+    "CAPACITY": 100000,
+    "ERROR_RATE": 0.001,
+    "SYNC_INTERVAL": 5,
+    "RESCAN_ROWS": 1000,
+    "REBUILD_INTERVAL": 3600,
 }
 
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL")
@@ -181,3 +246,62 @@ CELERY_RESULT_BACKEND = os.environ.get("CELERY_BROKER_URL")
 CELERY_TIMEZONE = "Ukraine/Kiev"
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+
+# Without a BACKEND, home timelines are read from the database. A
+# per-process backend (LocMem) only suits a single process running the
+# Celery tasks eagerly.
+SOCIAL_TIMELINE = {
+    "BACKEND": os.environ.get("TIMELINE_BACKEND"),
+    "LOCATION": os.environ.get("TIMELINE_LOCATION"),
+    "MAX_LENGTH": 800,
+    "FANOUT_LIMIT": 10000,
+}
+
+USER_TYPEAHEAD_CACHE_TIMEOUT = 60
+
+# Post/user objects: a per-process LRU in front of the default cache
+SOCIAL_CACHE = {
+    "LOCAL_MAX_SIZE": 10000,
+    "LOCAL_TIMEOUT": 5,
+    "SHARED_CACHE": "default",
+    "SHARED_TIMEOUT": 300,
+}
+
+# Serve the read-heavy endpoints with native async handlers (under ASGI)
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS") == "1"
+
+# Enabling the buffer needs a BACKEND shared with the Celery workers
+SOCIAL_LIKE_BUFFER = {
+    "ENABLED": os.environ.get("LIKE_BUFFER_ENABLED") == "1",
+    "BACKEND": os.environ.get(
+        "LIKE_BUFFER_BACKEND", "social.likes.LocMemLikeBuffer"
+    ),
+    "LOCATION": os.environ.get("LIKE_BUFFER_LOCATION"),
+}
+
+CELERY_BEAT_SCHEDULE = {
+    "publish-scheduled-posts": {
+        "task": "social.tasks.publish_scheduled_posts",
+        "schedule": 10.0,
+    },
+    "flush-like-buffer": {
+        "task": "social.tasks.flush_like_buffer",
+        "schedule": 5.0,
+    },
+    "purge-expired-tokens": {
+        "task": "user.tasks.purge_expired_tokens",
+        "schedule": 24 * 60 * 60,
+    },
+    "purge-abandoned-uploads": {
+        "task": "social.tasks.purge_abandoned_uploads",
+        "schedule": 60 * 60,
+    },
+    "resume-data-exports": {
+        "task": "social.tasks.resume_data_exports",
+        "schedule": 5 * 60,
+    },
+    "purge-expired-data-exports": {
+        "task": "social.tasks.purge_expired_data_exports",
+        "schedule": 60 * 60,
+    },
+}
@@ -0,0 +1,86 @@
+import time
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from social.backends import is_cache_shared
+
+
+def _user_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def _followed_ids_key(user_id):
+    return f"auth-followed-ids:{user_id}"
+
+
+def invalidate_cached_users(user_ids):
+    """Drop cached users (and their followed ids) after they changed"""
+    cache.delete_many(
+        [_user_key(user_id) for user_id in user_ids]
+        + [_followed_ids_key(user_id) for user_id in user_ids]
+    )
+
+
+def get_followed_ids(user):
+    """Ids of the accounts a user follows, cached like the user itself"""
+    if not is_cache_shared():
+        return set(user.follows.order_by().values_list("pk", flat=True))
+
+    key = _followed_ids_key(user.pk)
+    followed_ids = cache.get(key)
+
+    if followed_ids is None:
+        followed_ids = set(
+            user.follows.order_by().values_list("pk", flat=True)
+        )
+        cache.set(
+            key,
+            followed_ids,
+            api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        )
+
+    return followed_ids
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips the user query for a known token.
+
+    The token is verified on every request as usual. The user it names is
+    cached until the token expires, or until the user changes. Without a
+    shared default cache the user is read from the database every time,
+    as other processes could not drop their copy when the user changes.
+
+    The cached user is a snapshot for permission checks; views changing
+    the user load it again rather than saving this copy.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+
+        if user_id is None or not is_cache_shared():
+            return super().get_user(validated_token)
+
+        key = _user_key(user_id)
+        user = cache.get(key)
+
+        if user is None:
+            user = super().get_user(validated_token)
+            timeout = validated_token["exp"] - time.time()
+
+            if timeout > 0:
+                cache.set(key, user, timeout)
+        elif not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = "user.authentication.CachedJWTAuthentication"
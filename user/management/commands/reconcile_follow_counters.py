@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from user.tasks import reconcile_follow_counters
+
+
+class Command(BaseCommand):
+    help = "Recount followers/followings and repair drifted counters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        repaired = reconcile_follow_counters(
+            chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Repaired counters on {repaired} users")
+        )
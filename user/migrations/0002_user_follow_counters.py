@@ -0,0 +1,48 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_subquery(through, field):
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    through = User.followers.through
+
+    User.objects.update(
+        followers_count=_count_subquery(through, "from_user"),
+        followings_count=_count_subquery(through, "to_user"),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="followings_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:33
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def backfill_lookup_columns(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    User.objects.update(username_lower=Lower("username"), email_lower=Lower("email"))
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ("username_lower", "email_lower"):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS user_user_{column}_trgm_idx "
+            f"ON user_user USING GIN ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for column in ("username_lower", "email_lower"):
+        schema_editor.execute(f"DROP INDEX IF EXISTS user_user_{column}_trgm_idx")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0002_user_follow_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="email_lower",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=254
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="username_lower",
+            field=models.CharField(
+                db_index=True, default="", editable=False, max_length=60
+            ),
+        ),
+        migrations.RunPython(backfill_lookup_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
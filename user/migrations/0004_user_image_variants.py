@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("user", "0003_user_lookup_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="image_variants",
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -62,23 +62,46 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=60)
     bio = models.TextField(blank=True)
     image = models.ImageField(null=True, upload_to=user_image_file_path)
+    image_variants = models.JSONField(default=dict, editable=False)
     followers = models.ManyToManyField(
         "User",
         default=0,
         related_name="follows",
         symmetrical=False
     )
+    followers_count = models.PositiveIntegerField(default=0)
+    followings_count = models.PositiveIntegerField(default=0)
+    username_lower = models.CharField(
+        max_length=60,
+        default="",
+        db_index=True,
+        editable=False
+    )
+    email_lower = models.CharField(
+        max_length=254,
+        default="",
+        db_index=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ["first_name"]
 
-    @property
-    def followers_count(self):
-        return self.followers.count()
-
-    @property
-    def followings_count(self):
-        return self.follows.count()
+    def save(self, *args, **kwargs):
+        """Keep the lowercased lookup columns in sync with the originals"""
+        self.username_lower = (self.username or "").lower()
+        self.email_lower = (self.email or "").lower()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "username" in update_fields:
+                update_fields.add("username_lower")
+            if "email" in update_fields:
+                update_fields.add("email_lower")
+            kwargs["update_fields"] = update_fields
+
+        super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         return f"{self.first_name} {self.last_name}"
@@ -1,9 +1,20 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import gettext as _
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
+from social.fast_serializers import Field, FileField, ValuesSerializer
+from social_media_api.serializers import (
+    ImageSrcsetField,
+    UpdateFieldsMixin
+)
+from user.tokens import BloomRefreshToken
 
-class UserSerializer(serializers.ModelSerializer):
+BULK_FOLLOW_MAX_USERS = 100
+
+
+class UserSerializer(UpdateFieldsMixin, serializers.ModelSerializer):
+    image_srcset = ImageSrcsetField()
 
     class Meta:
         model = get_user_model()
@@ -12,6 +23,7 @@ class UserSerializer(serializers.ModelSerializer):
             "followers_count",
             "followings_count",
             "image",
+            "image_srcset",
             "email",
             "password",
             "username",
@@ -20,7 +32,12 @@ class UserSerializer(serializers.ModelSerializer):
             "bio",
             "is_staff"
         ]
-        read_only_fields = ("id", "is_staff")
+        read_only_fields = (
+            "id",
+            "followers_count",
+            "followings_count",
+            "is_staff",
+        )
         extra_kwargs = {"password": {"write_only": True, "min_length": 8}}
 
     def create(self, validated_data):
@@ -31,8 +48,8 @@ class UserSerializer(serializers.ModelSerializer):
         user = super().update(instance, validated_data)
 
         if password:
-            user.set_password()
-            user.save()
+            user.set_password(password)
+            user.save(update_fields=["password"])
 
         return user
 
@@ -52,6 +69,22 @@ class UserListSerializer(UserSerializer):
         ]
 
 
+class FastUserListSerializer(ValuesSerializer):
+    """Read-only twin of UserListSerializer over ``.values()`` rows"""
+
+    fields = {
+        "id": Field("id"),
+        "image": FileField(
+            "image", get_user_model()._meta.get_field("image").storage
+        ),
+        "email": Field("email"),
+        "username": Field("username"),
+        "first_name": Field("first_name"),
+        "last_name": Field("last_name"),
+        "is_staff": Field("is_staff"),
+    }
+
+
 class UserDetailSerializer(UserSerializer):
     followers = serializers.StringRelatedField(many=True)
     follows = serializers.StringRelatedField(many=True)
@@ -65,6 +98,7 @@ class UserDetailSerializer(UserSerializer):
             "followings_count",
             "follows",
             "image",
+            "image_srcset",
             "email",
             "username",
             "first_name",
@@ -74,6 +108,21 @@ class UserDetailSerializer(UserSerializer):
         ]
 
 
+class UserBulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_FOLLOW_MAX_USERS
+    )
+
+
+class UserTypeaheadSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = get_user_model()
+        fields = ["id", "username", "image"]
+
+
 class UserFollowersSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -81,6 +130,10 @@ class UserFollowersSerializer(serializers.ModelSerializer):
         fields = ["id", "followers"]
 
 
+class BloomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = BloomRefreshToken
+
+
 class AuthTokenSerializer(serializers.Serializer):
     email = serializers.CharField(
         label=_("Email"),
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from social.caching import invalidate_posts, invalidate_users
+from social.models import Post
+from user.authentication import invalidate_cached_users
+
+# User fields other cached objects show: the username in posts and their
+# comments, the full name in the followers and follows of other users
+SHOWN_FIELDS = {"username", "first_name", "last_name"}
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_saved_user(sender, instance, **kwargs):
+    # Deleting clears instance.pk before the transaction commits
+    user_ids = [instance.pk]
+    invalidate_cached_users(user_ids)
+    transaction.on_commit(lambda: invalidate_users(user_ids))
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_objects_showing_user(
+    sender, instance, created, update_fields, **kwargs
+):
+    if created or (
+        update_fields is not None and SHOWN_FIELDS.isdisjoint(update_fields)
+    ):
+        return
+
+    user_id = instance.pk
+    follows = sender.followers.through.objects
+
+    def invalidate():
+        invalidate_posts(
+            Post.objects.filter(
+                Q(created_by_id=user_id) | Q(comments__user_id=user_id)
+            ).values_list("pk", flat=True).distinct()
+        )
+        invalidate_users([
+            *follows.filter(from_user_id=user_id).values_list(
+                "to_user_id", flat=True
+            ),
+            *follows.filter(to_user_id=user_id).values_list(
+                "from_user_id", flat=True
+            ),
+        ])
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(m2m_changed, sender=get_user_model().followers.through)
+def invalidate_follow_change(sender, instance, action, pk_set, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        user_ids = [instance.pk, *(pk_set or ())]
+        invalidate_cached_users(user_ids)
+        transaction.on_commit(lambda: invalidate_users(user_ids))
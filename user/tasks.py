@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from celery import shared_task
+
+from social.caching import invalidate_users
+from user.authentication import invalidate_cached_users
+from user.tokens import reset_blacklist_filter
+
+
+def _follow_count_subquery(field):
+    through = get_user_model().followers.through
+
+    return Coalesce(
+        Subquery(
+            through.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0
+    )
+
+
+@shared_task
+def reconcile_follow_counters(chunk_size=10000):
+    """Repair drifted followers_count/followings_count values.
+
+    Every chunk is fixed with a single UPDATE ... WHERE pk IN (...)
+    statement, so users are never loaded into Python: only the ids of
+    the drifted ones, to drop their cached copies.
+    """
+    users = get_user_model().objects
+    bounds = users.aggregate(low=Min("pk"), high=Max("pk"))
+
+    if bounds["low"] is None:
+        return 0
+
+    repaired = 0
+
+    for start in range(bounds["low"], bounds["high"] + 1, chunk_size):
+        with transaction.atomic():
+            user_ids = list(
+                users.filter(pk__gte=start, pk__lt=start + chunk_size)
+                .annotate(
+                    actual_followers=_follow_count_subquery("from_user"),
+                    actual_followings=_follow_count_subquery("to_user"),
+                )
+                .filter(
+                    ~Q(followers_count=F("actual_followers"))
+                    | ~Q(followings_count=F("actual_followings"))
+                )
+                .order_by()
+                .values_list("pk", flat=True)
+            )
+            users.filter(pk__in=user_ids).update(
+                followers_count=_follow_count_subquery("from_user"),
+                followings_count=_follow_count_subquery("to_user"),
+            )
+            invalidate_cached_users(user_ids)
+            transaction.on_commit(
+                lambda user_ids=user_ids: invalidate_users(user_ids)
+            )
+            repaired += len(user_ids)
+
+    return repaired
+
+
+@shared_task
+def purge_expired_tokens(chunk_size=1000):
+    """Delete expired outstanding tokens and their blacklist entries.
+
+    Rows go in chunks of ``chunk_size`` so no statement holds locks on a
+    large part of either table.
+    """
+    now = timezone.now()
+    purged = 0
+
+    while True:
+        token_ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+
+        if not token_ids:
+            break
+
+        with transaction.atomic():
+            BlacklistedToken.objects.filter(token_id__in=token_ids).delete()
+            OutstandingToken.objects.filter(pk__in=token_ids).delete()
+
+        purged += len(token_ids)
+
+    if purged:
+        reset_blacklist_filter()
+
+    return purged
@@ -1,3 +1,402 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from social import caching
+from social.models import Comment, Post
+from user.authentication import _user_key, get_followed_ids
+from user.serializers import FastUserListSerializer, UserListSerializer
+from user.tasks import reconcile_follow_counters
+from user.tokens import (
+    BloomRefreshToken,
+    _get_filter,
+    might_be_blacklisted,
+    reset_blacklist_filter
+)
+
+
+def create_user(index, **extra_fields):
+    return get_user_model().objects.create_user(
+        email=f"user{index}@example.com",
+        password="password123",
+        username=f"user{index}",
+        first_name="Test",
+        last_name=f"User {index}",
+        **extra_fields
+    )
+
+
+class UserTestCase(TestCase):
+    """Starts every test with empty caches"""
+
+    def setUp(self):
+        cache.clear()
+        caching.get_cache.cache_clear()
+
+        self.user = create_user(1)
+        self.client = APIClient()
+
+
+class ManageUserTests(UserTestCase):
+    url = reverse("user:manage")
+
+    def test_update_keeps_counters_changed_since_the_user_was_loaded(self):
+        stale = get_user_model().objects.get(pk=self.user.pk)
+        follower = create_user(2)
+        self.client.force_authenticate(follower)
+        self.client.patch(
+            reverse("user:user-follow", args=[self.user.pk])
+        )
+
+        self.client.force_authenticate(stale)
+        response = self.client.patch(self.url, {"first_name": "Renamed"})
+        self.user.refresh_from_db()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.first_name, "Renamed")
+        self.assertEqual(self.user.followers_count, 1)
+
+    def test_update_sets_the_new_password(self):
+        self.client.force_authenticate(self.user)
+        self.client.patch(self.url, {"password": "new-password-456"})
+        self.user.refresh_from_db()
+
+        self.assertTrue(self.user.check_password("new-password-456"))
+
+    def test_renaming_drops_the_cached_objects_showing_the_user(self):
+        author = create_user(2)
+        follower = create_user(3)
+        follower.follows.add(self.user)
+        post = Post.objects.create(
+            created_by=author, hashtag="test", title="Post", content="Text"
+        )
+        Comment.objects.create(post=post, user=self.user, content="Hi")
+        caching.get_posts([post.pk])
+        caching.get_users([follower.pk])
+
+        self.client.force_authenticate(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                self.url, {"username": "renamed", "first_name": "New"}
+            )
+        post = caching.get_posts([post.pk])[post.pk]
+        follower = caching.get_users([follower.pk])[follower.pk]
+
+        self.assertEqual(
+            [comment.user.username for comment in post._first_comments],
+            ["renamed"]
+        )
+        self.assertEqual(
+            [str(user) for user in follower.follows.all()],
+            ["New User 1"]
+        )
+
+
+class ReconcileFollowCountersTests(UserTestCase):
+
+    def test_repaired_users_are_dropped_from_the_cache(self):
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            followers_count=4
+        )
+        caching.get_users([self.user.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            repaired = reconcile_follow_counters()
+        user = caching.get_users([self.user.pk])[self.user.pk]
+
+        self.assertEqual(repaired, 1)
+        self.assertEqual(user.followers_count, 0)
+
+
+class CachedJWTAuthenticationTests(UserTestCase):
+    url = reverse("user:manage")
+
+    def setUp(self):
+        # A cache on disk is shared by every process, unlike LocMemCache
+        self.enterContext(override_settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": self.enterContext(tempfile.TemporaryDirectory()),
+        }}))
+        super().setUp()
+
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_caches_the_user_of_a_token(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache.get(_user_key(self.user.pk)), self.user)
+
+    def test_followed_ids_are_cached_as_a_set(self):
+        followed = create_user(2)
+        self.user.follows.add(followed)
+
+        self.assertEqual(get_followed_ids(self.user), {followed.pk})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_followed_ids(self.user), {followed.pk})
+
+    def test_rejects_an_inactive_cached_user(self):
+        inactive = get_user_model().objects.get(pk=self.user.pk)
+        inactive.is_active = False
+        cache.set(_user_key(self.user.pk), inactive)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_update_saves_the_user_loaded_from_the_database(self):
+        self.client.get(self.url)
+        # Bypasses the signals, the cached copy still has 0 followers
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            followers_count=3
+        )
+
+        response = self.client.patch(self.url, {"first_name": "Renamed"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["followers_count"], 3)
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }})
+    def test_reads_the_user_from_the_database_without_a_shared_cache(self):
+        self.client.get(self.url)
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertIsNone(cache.get(_user_key(self.user.pk)))
+        self.assertEqual(response.status_code, 401)
+
+
+class FastUserListSerializerTests(UserTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(
+            MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())
+        ))
+
+        image = BytesIO()
+        Image.new("RGB", (10, 10)).save(image, "PNG")
+        self.user.image = SimpleUploadedFile(
+            "image.png", image.getvalue(), content_type="image/png"
+        )
+        self.user.save()
+        create_user(2)
+        create_user(3, image="")
+
+    def test_renders_like_user_list_serializer(self):
+        context = {"request": APIRequestFactory().get("/")}
+        fast = FastUserListSerializer(context)
+        queryset = get_user_model().objects.order_by("pk")
+        content = JSONRenderer().render(fast.serialize(fast.values(queryset)))
+
+        self.assertEqual(
+            content,
+            JSONRenderer().render(
+                UserListSerializer(queryset, many=True, context=context).data
+            )
+        )
+        self.assertIn(b'"image":"http://testserver/media/', content)
+        self.assertIn(b'"image":null', content)
+
+
+class TypeaheadTests(UserTestCase):
+    url = reverse("user:user-typeahead")
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def _create_user(self, username, email):
+        return get_user_model().objects.create_user(
+            email=email, password="password123", username=username
+        )
+
+    def _usernames(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+
+        return [user["username"] for user in response.data]
+
+    def test_username_matches_come_before_email_matches(self):
+        self._create_user("Alice", "alice@example.com")
+        self._create_user("zed", "ALINA@example.com")
+        self._create_user("bob", "bob@example.com")
+
+        self.assertEqual(self._usernames(q="ALI"), ["Alice", "zed"])
+
+    def test_results_are_a_slim_projection(self):
+        response = self.client.get(self.url, {"q": "user1"})
+
+        self.assertEqual(list(response.data[0]), ["id", "username", "image"])
+
+    @override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+    )
+    def test_limit_defaults_to_10_and_is_capped(self):
+        for index in range(2, 26):
+            create_user(index)
+
+        self.assertEqual(len(self._usernames(q="user")), 10)
+        self.assertEqual(len(self._usernames(q="user", limit=100)), 20)
+        self.assertEqual(len(self._usernames(q="user", limit=0)), 1)
+
+    def test_empty_prefix_matches_nobody(self):
+        self.assertEqual(self._usernames(q="  "), [])
+
+    def test_results_are_cached_per_prefix(self):
+        self.assertEqual(self._usernames(q="carol"), [])
+        self._create_user("carol", "carol@example.com")
+
+        self.assertEqual(self._usernames(q="carol"), [])
+        self.assertEqual(self._usernames(q="caro"), ["carol"])
+
+
+class FollowTests(UserTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.others = [create_user(2), create_user(3)]
+        self.client.force_authenticate(self.user)
+
+    def _patch(self, action, user):
+        return self.client.patch(
+            reverse(f"user:user-{action}", args=[user.pk])
+        )
+
+    def _counts(self):
+        users = get_user_model().objects.in_bulk(
+            [self.user.pk, *(user.pk for user in self.others)]
+        )
+
+        return (
+            users[self.user.pk].followings_count,
+            [users[user.pk].followers_count for user in self.others]
+        )
+
+    def test_follow(self):
+        response = self._patch("follow", self.others[0])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._counts(), (1, [1, 0]))
+        self.assertQuerySetEqual(self.user.follows.all(), [self.others[0]])
+
+    def test_repeated_follow_counts_once(self):
+        self._patch("follow", self.others[0])
+        self._patch("follow", self.others[0])
+
+        self.assertEqual(self._counts(), (1, [1, 0]))
+
+    def test_unfollow(self):
+        self._patch("follow", self.others[0])
+        self._patch("unfollow", self.others[0])
+        self._patch("unfollow", self.others[0])
+
+        self.assertEqual(self._counts(), (0, [0, 0]))
+        self.assertFalse(self.user.follows.exists())
+
+    def test_bulk_follow_and_unfollow(self):
+        self._patch("follow", self.others[0])
+        user_ids = [user.pk for user in self.others] + [self.user.pk, 999]
+
+        response = self.client.post(
+            reverse("user:user-bulk-follow"),
+            {"user_ids": user_ids},
+            format="json"
+        )
+
+        self.assertEqual(response.data["user_ids"], [self.others[1].pk])
+        self.assertEqual(self._counts(), (2, [1, 1]))
+
+        response = self.client.post(
+            reverse("user:user-bulk-unfollow"),
+            {"user_ids": user_ids},
+            format="json"
+        )
+
+        self.assertEqual(
+            response.data["user_ids"], [user.pk for user in self.others]
+        )
+        self.assertEqual(self._counts(), (0, [0, 0]))
+
+
+class BlacklistFilterTests(UserTestCase):
+    url = reverse("user:token_refresh")
+
+    def setUp(self):
+        super().setUp()
+        reset_blacklist_filter()
+        self.addCleanup(reset_blacklist_filter)
+
+    def _blacklist_row(self, pk):
+        """Blacklist a new token under ``pk``, as another process would"""
+        token = BloomRefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(
+            pk=pk, token=OutstandingToken.objects.get(jti=token["jti"])
+        )
+
+        return token["jti"]
+
+    def test_rejects_a_blacklisted_token(self):
+        token = BloomRefreshToken.for_user(self.user)
+        token.blacklist()
+
+        response = self.client.post(self.url, {"refresh": str(token)})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_accepts_a_token_without_a_blacklist_lookup(self):
+        token = BloomRefreshToken.for_user(self.user)
+        self.assertFalse(might_be_blacklisted(token["jti"]))
+
+        with self.assertNumQueries(0):
+            BloomRefreshToken(str(token))
+
+        response = self.client.post(self.url, {"refresh": str(token)})
+
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(JTI_BLACKLIST_FILTER={"SYNC_INTERVAL": -1})
+    def test_finds_a_row_committed_after_higher_pks(self):
+        self._blacklist_row(pk=20)
+        self.assertFalse(might_be_blacklisted("unknown"))
+
+        # Its pk was taken before pk 20, but it committed afterwards
+        late_jti = self._blacklist_row(pk=10)
+
+        self.assertTrue(might_be_blacklisted(late_jti))
+        self.assertEqual(_get_filter().bloom.count, 2)
+
+    @override_settings(JTI_BLACKLIST_FILTER={
+        "SYNC_INTERVAL": -1, "RESCAN_ROWS": 0
+    })
+    def test_a_rebuild_finds_rows_below_the_rescan_window(self):
+        self._blacklist_row(pk=20)
+        self.assertFalse(might_be_blacklisted("unknown"))
+        late_jti = self._blacklist_row(pk=10)
+
+        self.assertFalse(might_be_blacklisted(late_jti))
+
+        with override_settings(JTI_BLACKLIST_FILTER={"REBUILD_INTERVAL": -1}):
+            self.assertTrue(might_be_blacklisted(late_jti))
@@ -0,0 +1,192 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+DEFAULTS = {
+    "CAPACITY": 100000,
+    "ERROR_RATE": 0.001,
+    "SYNC_INTERVAL": 5,
+    "RESCAN_ROWS": 1000,
+    "REBUILD_INTERVAL": 3600,
+}
+
+
+def blacklist_filter_settings():
+    return {**DEFAULTS, **getattr(settings, "JTI_BLACKLIST_FILTER", {})}
+
+
+class BloomFilter:
+    """Fixed-size set membership test with no false negatives"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position // 8] & (1 << (position % 8))
+            for position in self._positions(value)
+        )
+
+
+class _BlacklistFilter:
+    """Bloom filter of blacklisted JTIs kept in step with the database.
+
+    The highest synced BlacklistedToken pk is remembered, so catching up
+    with other processes is one range query. Primary keys are handed out
+    before commit, so a row can appear after rows with higher pks; each
+    sync rescans the last RESCAN_ROWS pks below that mark for such late
+    rows, and the whole filter is rebuilt every REBUILD_INTERVAL seconds
+    in case one arrives later still. Syncs happen when a process
+    blacklists a token (announced through a generation counter in the
+    shared cache) and at least every SYNC_INTERVAL seconds otherwise.
+    """
+
+    GENERATION_KEY = "jti-blacklist-generation"
+
+    def __init__(self):
+        options = blacklist_filter_settings()
+        self.bloom = BloomFilter(
+            max(options["CAPACITY"], BlacklistedToken.objects.count() * 2),
+            options["ERROR_RATE"]
+        )
+        self.last_pk = 0
+        # Synced pks inside the rescan window, so rescans add each row once
+        self.recent_pks = set()
+        self.generation = None
+        self.synced_at = None
+        self.built_at = time.monotonic()
+        self.sync()
+
+    def sync(self):
+        rescan_rows = blacklist_filter_settings()["RESCAN_ROWS"]
+        rows = (
+            BlacklistedToken.objects.filter(pk__gt=self.last_pk - rescan_rows)
+            .order_by("pk")
+            .values_list("pk", "token__jti")
+        )
+        self.generation = cache.get(self.GENERATION_KEY)
+
+        for pk, jti in rows.iterator(chunk_size=10000):
+            if pk not in self.recent_pks:
+                self.bloom.add(jti)
+                self.recent_pks.add(pk)
+
+            self.last_pk = max(self.last_pk, pk)
+
+        floor = self.last_pk - rescan_rows
+        self.recent_pks = {pk for pk in self.recent_pks if pk > floor}
+        self.synced_at = time.monotonic()
+
+    def is_expired(self):
+        interval = blacklist_filter_settings()["REBUILD_INTERVAL"]
+
+        return time.monotonic() - self.built_at > interval
+
+    def is_stale(self):
+        interval = blacklist_filter_settings()["SYNC_INTERVAL"]
+
+        return (
+            time.monotonic() - self.synced_at > interval
+            or cache.get(self.GENERATION_KEY) != self.generation
+        )
+
+    def announce(self):
+        cache.add(self.GENERATION_KEY, 0, None)
+
+        try:
+            cache.incr(self.GENERATION_KEY)
+        except ValueError:
+            pass
+
+
+_lock = threading.Lock()
+_filter = None
+
+
+def _get_filter():
+    """The process-wide filter, built from the database on first use"""
+    global _filter
+
+    with _lock:
+        if _filter is None or _filter.is_expired():
+            _filter = _BlacklistFilter()
+        elif _filter.is_stale():
+            _filter.sync()
+
+        if _filter.bloom.count > _filter.bloom.capacity:
+            _filter = _BlacklistFilter()
+
+        return _filter
+
+
+def reset_blacklist_filter():
+    """Forget the filter, so the next check rebuilds it"""
+    global _filter
+
+    with _lock:
+        _filter = None
+
+
+def might_be_blacklisted(jti):
+    return jti in _get_filter().bloom
+
+
+def record_blacklisted(jti):
+    """Add a JTI right away and tell other processes to sync"""
+    blacklist_filter = _get_filter()
+
+    with _lock:
+        blacklist_filter.bloom.add(jti)
+
+    blacklist_filter.announce()
+
+
+class BloomRefreshToken(RefreshToken):
+    """Refresh token whose blacklist check usually skips the database.
+
+    Only JTIs the Bloom filter may contain are looked up. ``blacklist()``
+    still rejects a token another process blacklisted moments ago, so
+    logging out twice fails as before.
+    """
+
+    def check_blacklist(self):
+        if might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        record_blacklisted(self.payload[api_settings.JTI_CLAIM])
+
+        if not created:
+            raise TokenError(_("Token is blacklisted"))
+
+        return blacklisted, created
@@ -1,26 +1,146 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from social.async_views import AsyncViewMixin
+from social.caching import get_users, invalidate_users
+from social.db_router import ReplicaReadMixin
+from social.images import discard_variants
+from social.streaming import STREAM_PARAMETER, StreamingListMixin
+from social.tasks import schedule_image_variants
+from social.timeline import invalidate_timeline
+from user.authentication import invalidate_cached_users
 from user.permissions import IsAdminOrIsAuthenticatedReadOnly
+from user.tokens import BloomRefreshToken
 from user.serializers import (
+    FastUserListSerializer,
     UserSerializer,
     UserDetailSerializer,
     UserListSerializer,
-    UserFollowersSerializer
+    UserBulkFollowSerializer,
+    UserFollowersSerializer,
+    UserTypeaheadSerializer
 )
 
 
-class CreateUserView(generics.CreateAPIView):
+def _change_follows(follower, user_ids, follow):
+    """Follow or unfollow users, returning the ids actually changed.
+
+    Every follow of the follower is written behind a lock on their row,
+    so concurrent requests from the same follower cannot double-count.
+    The followings count moves by what the write did: the rows deleted,
+    or the rows found once the inserts are in. Existence is checked with
+    one indexed query on the through table instead of loading whole
+    follower lists.
+    """
+    users = get_user_model().objects
+    through = get_user_model().followers.through
+    user_ids = set(user_ids) - {follower.pk}
+
+    with transaction.atomic():
+        # An UPDATE rather than select_for_update(), which SQLite ignores:
+        # it locks the row on PostgreSQL and the database on SQLite
+        users.filter(pk=follower.pk).update(
+            followings_count=F("followings_count")
+        )
+
+        links = through.objects.filter(
+            to_user_id=follower.pk, from_user_id__in=user_ids
+        )
+        existing = set(links.values_list("from_user_id", flat=True))
+
+        if follow:
+            changed = sorted(user_ids - existing)
+            through.objects.bulk_create(
+                [
+                    through(from_user_id=user_id, to_user_id=follower.pk)
+                    for user_id in changed
+                ],
+                ignore_conflicts=True
+            )
+            delta = 1
+            written = links.count() - len(existing) if changed else 0
+        else:
+            changed = sorted(existing)
+            delta = -1
+            written, _ = links.delete()
+
+        if written:
+            users.filter(pk__in=changed).update(
+                followers_count=F("followers_count") + delta
+            )
+            users.filter(pk=follower.pk).update(
+                followings_count=F("followings_count") + delta * written
+            )
+
+    if changed:
+        invalidate_timeline(follower)
+        invalidate_cached_users([follower.pk, *changed])
+        invalidate_users([follower.pk, *changed])
+
+    return changed
+
+
+TYPEAHEAD_MAX_LIMIT = 20
+
+
+def _typeahead_users(prefix, limit):
+    """Match a lowercase prefix with btree range scans on both columns"""
+    users = get_user_model().objects.only("id", "username", "image")
+    upper_bound = prefix + "\uffff"
+
+    by_username = list(
+        users.filter(
+            username_lower__gte=prefix, username_lower__lt=upper_bound
+        ).order_by("username_lower")[:limit]
+    )
+    found = {user.pk for user in by_username}
+    by_email = [
+        user
+        for user in users.filter(
+            email_lower__gte=prefix, email_lower__lt=upper_bound
+        ).order_by("email_lower")[:limit]
+        if user.pk not in found
+    ]
+
+    return (by_username + by_email)[:limit]
+
+
+class ImageVariantsMixin:
+    """Regenerate image variants whenever a new image is uploaded"""
+
+    def perform_create(self, serializer):
+        schedule_image_variants(serializer.save())
+
+    def perform_update(self, serializer):
+        if "image" in serializer.validated_data:
+            discard_variants(serializer.instance)
+            schedule_image_variants(serializer.save(image_variants={}))
+        else:
+            serializer.save()
+
+
+class CreateUserView(ImageVariantsMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    ReplicaReadMixin,
+    AsyncViewMixin,
+    StreamingListMixin,
+    ImageVariantsMixin,
+    viewsets.ModelViewSet
+):
     queryset = get_user_model().objects.all()
     serializer_class = UserSerializer
     permission_classes = (IsAdminOrIsAuthenticatedReadOnly,)
@@ -35,21 +155,58 @@ class UserViewSet(viewsets.ModelViewSet):
         if self.action in ("follow", "unfollow"):
             return UserFollowersSerializer
 
+        if self.action in ("bulk_follow", "bulk_unfollow"):
+            return UserBulkFollowSerializer
+
+        if self.action == "typeahead":
+            return UserTypeaheadSerializer
+
         return UserSerializer
 
     def get_queryset(self):
-        queryset = self.queryset.prefetch_related("followers", "follows")
+        queryset = self.queryset
+
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("followers", "follows")
+
         email = self.request.query_params.get("email")
         username = self.request.query_params.get("username")
 
         if email:
-            queryset = queryset.filter(email__icontains=email)
+            queryset = queryset.filter(email_lower__contains=email.lower())
 
         if username:
-            queryset = queryset.filter(username__icontains=username)
+            queryset = queryset.filter(
+                username_lower__contains=username.lower()
+            )
 
         return queryset
 
+    def get_object(self):
+        """Serve user detail from the object cache when unfiltered"""
+        params = self.request.query_params
+
+        if (
+            self.action != "retrieve"
+            or params.get("email")
+            or params.get("username")
+        ):
+            return super().get_object()
+
+        try:
+            pk = int(self.kwargs["pk"])
+        except ValueError:
+            raise Http404
+
+        user = get_users([pk]).get(pk)
+
+        if user is None:
+            raise Http404
+
+        self.check_object_permissions(self.request, user)
+
+        return user
+
     @action(
         methods=["PATCH"],
         detail=True,
@@ -61,9 +218,7 @@ class UserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         follower = self.request.user
 
-        if user != follower and follower not in user.followers.all():
-            user.followers.add(follower)
-            user.save()
+        _change_follows(follower, [user.pk], follow=True)
 
         return Response(status=status.HTTP_200_OK)
 
@@ -78,12 +233,88 @@ class UserViewSet(viewsets.ModelViewSet):
         user = self.get_object()
         follower = self.request.user
 
-        if user != follower and follower in user.followers.all():
-            user.followers.remove(follower)
-            user.save()
+        _change_follows(follower, [user.pk], follow=False)
 
         return Response(status=status.HTTP_200_OK)
 
+    def _bulk_change_follows(self, request, follow):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        user_ids = self.queryset.filter(
+            pk__in=serializer.validated_data["user_ids"]
+        ).values_list("pk", flat=True)
+        changed = _change_follows(request.user, user_ids, follow=follow)
+
+        return Response({"user_ids": changed}, status=status.HTTP_200_OK)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk_follow",
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_follow(self, request):
+        """Endpoint for users to follow several users at once"""
+        return self._bulk_change_follows(request, follow=True)
+
+    @action(
+        methods=["POST"],
+        detail=False,
+        url_path="bulk_unfollow",
+        permission_classes=(IsAuthenticated,)
+    )
+    def bulk_unfollow(self, request):
+        """Endpoint for users to unfollow several users at once"""
+        return self._bulk_change_follows(request, follow=False)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Username or email prefix (ex. ?q=joh)"
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Number of results "
+                            f"(max {TYPEAHEAD_MAX_LIMIT})"
+            )
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="typeahead",
+        permission_classes=(IsAuthenticated,)
+    )
+    def typeahead(self, request):
+        """Endpoint for username/email prefix autocomplete"""
+        prefix = request.query_params.get("q", "").strip().lower()
+
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+
+        if not prefix:
+            return Response([])
+
+        cache_key = f"user-typeahead:{limit}:{prefix}"
+        users = cache.get(cache_key)
+
+        if users is None:
+            users = _typeahead_users(prefix, limit)
+            cache.set(
+                cache_key, users, settings.USER_TYPEAHEAD_CACHE_TIMEOUT
+            )
+
+        serializer = self.get_serializer(users, many=True)
+
+        return Response(serializer.data)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -95,19 +326,36 @@ class UserViewSet(viewsets.ModelViewSet):
                 name="username",
                 type=str,
                 description="Filter by username (ex. ?username=YourUsername)"
-            )
+            ),
+            STREAM_PARAMETER
         ]
     )
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        serializer = FastUserListSerializer(self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if self.wants_stream():
+            return self.stream_list(serializer, queryset)
+
+        rows = serializer.values(queryset)
+
+        return Response(serializer.serialize(rows))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        user = await sync_to_async(self.get_object)()
+        serializer = self.get_serializer(user)
+
+        return Response(serializer.data)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(ImageVariantsMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # request.user may be the copy cached by CachedJWTAuthentication,
+        # saving it would write back whatever it holds
+        return get_user_model().objects.get(pk=self.request.user.pk)
 
 
 class LogoutView(APIView):
@@ -116,8 +364,9 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh_token = request.data["refresh_token"]
-            token = RefreshToken(refresh_token)
+            token = BloomRefreshToken(refresh_token)
             token.blacklist()
+            invalidate_cached_users([request.user.pk])
             return Response(status=status.HTTP_205_RESET_CONTENT)
 
         except Exception as e: